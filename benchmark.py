@@ -0,0 +1,140 @@
+# Script comparing the running time of the probability engines available in the hand_probability module
+# on suit requirement sets of growing size, showing the numbers of requirements at which the faster of
+# the convolution engine and the Cartesian product engine (which sums the cheapest of its formulations) changes,
+# and the speedup of the closed-form kernels over the generic enumeration.
+
+from hand_probability import DeckInfo, HandProbability, CardRequirement, ProbabilityFunction
+from itertools import repeat
+from timeit import Timer
+
+ROUNDS: int = 5
+
+
+def best_time(run) -> float:
+    """
+    Returns the shortest of ROUNDS running times of the callable, each averaged over enough calls
+    to take at least 0.2 seconds.
+    """
+    timer = Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=ROUNDS, number=number)) / number
+
+
+def time_engine(deck_info: DeckInfo, engine: str, card_requirements: tuple[CardRequirement, ...],
+                selected_cards_count: int):
+    # a fresh deck with a pre-filled binomial table and no cache of compiled functions, so that every call
+    # compiles and evaluates the hand and no engine benefits from the work of another
+    deck_info = DeckInfo(deck_info.deck_size, deck_info.cards_of_rank_count, deck_info.cards_of_suit_count)
+    deck_info.binomial_table.reserve(deck_info.deck_size)
+    hand_probability = HandProbability(deck_info, engine=engine, cache_size=0)
+    result = None
+
+    def run():
+        nonlocal result
+        result = hand_probability.create_probability_func(*card_requirements)(selected_cards_count)
+
+    return best_time(run), result
+
+
+def time_closed_form(deck_info: DeckInfo, card_requirements: tuple[CardRequirement, ...],
+                     selected_cards_counts: range) -> tuple[float, float]:
+    """
+    Returns the running times of compiling and evaluating the hand with its closed-form kernel and of computing
+    the same probabilities from the exact count polynomial of the generic enumeration (numerator()).
+    """
+    hand_probability = HandProbability(deck_info, cache_size=0)
+    closed_form_results = generic_results = None
+
+    def closed_form():
+        nonlocal closed_form_results
+        func = hand_probability.create_probability_func(*card_requirements)
+        closed_form_results = [func(selected_cards_count) for selected_cards_count in selected_cards_counts]
+
+    def generic():
+        nonlocal generic_results
+        func = hand_probability.create_probability_func(*card_requirements)
+        generic_results = [
+            func.numerator(selected_cards_count) / hand_probability.denominator(selected_cards_count)
+            for selected_cards_count in selected_cards_counts
+        ]
+
+    closed_form_time = best_time(closed_form)
+    generic_time = best_time(generic)
+    if closed_form_results != generic_results:
+        raise AssertionError(f"closed form disagrees with the generic enumeration for {card_requirements}")
+    return closed_form_time, generic_time
+
+
+def compare_closed_forms():
+    for deck_info in (DeckInfo(deck_size=24, cards_of_rank_count=4, cards_of_suit_count=6),
+                      DeckInfo(deck_size=1_000, cards_of_rank_count=40, cards_of_suit_count=250)):
+        cards_of_rank_count, cards_of_suit_count = deck_info.cards_of_rank_count, deck_info.cards_of_suit_count
+        hands = {
+            "high card": (CardRequirement(1, cards_of_rank_count),),
+            "pair": (CardRequirement(2, cards_of_rank_count),),
+            "flush": (CardRequirement(5, cards_of_suit_count),),
+            "four of a kind": (CardRequirement(4, 4),),
+            "straight flush": tuple(repeat(CardRequirement(1, 1), 5)),
+        }
+        selected_cards_counts = range(1, deck_info.deck_size, max(deck_info.deck_size // 50, 1))
+
+        print(f"\n{deck_info.deck_size} card deck, {len(selected_cards_counts)} table sizes")
+        print(f"{'hand':>14} {'kernel':>18} {'closed form [s]':>16} {'generic [s]':>12} {'speedup':>8}")
+        slower = []
+        for name, card_requirements in hands.items():
+            closed_form_time, generic_time = time_closed_form(deck_info, card_requirements, selected_cards_counts)
+            kernel = ProbabilityFunction(deck_info, card_requirements).kernel
+            print(f"{name:>14} {kernel:>18} {closed_form_time:>16.6f} {generic_time:>12.6f} "
+                  f"{generic_time / closed_form_time:>8.1f}")
+            if closed_form_time > generic_time:
+                slower.append(name)
+        if slower:
+            print(f"the closed form is slower than the generic enumeration for: {', '.join(slower)}")
+
+
+def main():
+    # a double deck of 8 suits of 13 cards and requirements of growing size with different minimums of cards
+    # of distinct suits, which are neither grouped by symmetry nor evaluated by a closed-form kernel
+    deck_info = DeckInfo(deck_size=104, cards_of_rank_count=8, cards_of_suit_count=13)
+    at_least_of_suits = (2, 3, 4, 5, 6, 7)
+    selected_cards_count = 20
+
+    print(f"{'suits':>5} {'product terms':>14} {'product [s]':>12} {'convolution [s]':>16} {'speedup':>8} "
+          f"{'faster':>12}")
+    faster_engines = []
+    for suit_count in range(1, len(at_least_of_suits) + 1):
+        card_requirements = tuple(CardRequirement(at_least, deck_info.cards_of_suit_count)
+                                  for at_least in at_least_of_suits[:suit_count])
+        func = ProbabilityFunction(deck_info, card_requirements)
+        product_time, product_result = time_engine(
+            deck_info, HandProbability.PRODUCT_ENGINE, card_requirements, selected_cards_count
+        )
+        convolution_time, convolution_result = time_engine(
+            deck_info, HandProbability.CONVOLUTION_ENGINE, card_requirements, selected_cards_count
+        )
+        if product_result != convolution_result:
+            raise AssertionError(f"engines disagree for {suit_count} suits")
+
+        if func.kernel is None:
+            faster_engine = HandProbability.CONVOLUTION_ENGINE if convolution_time < product_time \
+                else HandProbability.PRODUCT_ENGINE
+            faster_engines.append((suit_count, faster_engine))
+        else:
+            # both engines evaluate the same closed form, so the times differ only by the compilation
+            faster_engine = f"({func.kernel} kernel)"
+        product_terms = min(func.explain().costs.values())
+        speedup = product_time / convolution_time
+        print(f"{suit_count:>5} {product_terms:>14} {product_time:>12.6f} {convolution_time:>16.6f} {speedup:>8.1f} "
+              f"{faster_engine:>12}")
+
+    previous_engine = None
+    for suit_count, faster_engine in faster_engines:
+        if faster_engine != previous_engine:
+            print(f"{faster_engine} engine is faster from {suit_count} suit requirement(s)")
+        previous_engine = faster_engine
+
+    compare_closed_forms()
+
+
+if __name__ == '__main__':
+    main()
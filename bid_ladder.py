@@ -0,0 +1,191 @@
+from bisect import bisect_right
+from hand_probability import DeckInfo, HandProbability, CardRequirement, check_selected_cards_count
+from itertools import permutations, repeat
+from typing import NamedTuple
+
+
+class Bid(NamedTuple):
+    """
+    Represents a concrete liar's poker bid, e.g. a full house of queens over nines.
+
+    :ivar hand: The name of the hand category, as in probability_data.json.
+    :ivar ranks: The ranks specified by the bid, the most significant first, counted from 0 for the lowest rank.
+        For straights and straight flushes it is the lowest rank of the window.
+    :ivar suit: The suit specified by the bid, or None for hands that do not specify a suit.
+    :ivar requirements: The (at_least, out_of) pairs of the card requirements of the bid.
+    """
+    hand: str
+    ranks: tuple[int, ...]
+    suit: int | None
+    requirements: tuple[tuple[int, int], ...]
+
+
+class BidLadder:
+    """
+    Index of every concrete bid of the deck sorted along the bid order of the game, with the probabilities
+    of every bid for every number of cards on the table.
+
+    For every number of cards the index keeps a max segment tree over the bid order, which finds the next bid
+    above a given one that reaches a probability threshold, and the bids sorted by probability with the running
+    maximum of their positions in the bid order, which finds the strongest bid reaching a threshold.
+    Both queries take O(log B) time for B bids.
+
+    Bids of the same shape (e.g. a pair of nines and a pair of aces) share a single probability function,
+    so the construction evaluates only one curve per hand category.
+
+    :ivar deck_info: The information related to the deck being utilized.
+    :type deck_info: DeckInfo
+    :ivar bids: Every concrete bid in the bid order, the weakest first.
+    :type bids: list[Bid]
+
+    Example:
+        ladder = BidLadder(deck_info)
+        ladder.next_bid(Bid("pair", (3,), None, ((2, 4),)), 0.5, 10)
+
+        returns the weakest bid above a pair of queens that is at least 50% likely when 10 cards are on the table
+    """
+    BID_ORDER = (
+        "highCard", "pair", "twoPair", "straight", "threeOfAKind", "fullHouse", "flush", "fourOfAKind",
+        "straightFlush",
+    )
+    STRAIGHT_LENGTH = 5
+    FLUSH_LENGTH = 5
+
+    def __init__(self, deck_info: DeckInfo, bid_order: tuple[str, ...] = BID_ORDER,
+                 digits_of_precision: int | None = None):
+        deck_info.check_classes()
+        self.deck_info = deck_info
+        self.bids = [bid for hand in bid_order for bid in self._hand_bids(hand)]
+        self._positions = {bid: position for position, bid in enumerate(self.bids)}
+
+        hand_probability = HandProbability(deck_info, digits_of_precision=digits_of_precision)
+        curves = {}
+        for bid in self.bids:
+            if bid.requirements not in curves:
+                curves[bid.requirements] = hand_probability.create_probability_func(
+                    *(CardRequirement(*requirement) for requirement in bid.requirements)
+                ).curve()
+        # probabilities[n][position] is the probability of the bid at the position when n cards are on the table
+        self._probabilities = [
+            [curves[bid.requirements][selected_cards_count] for bid in self.bids]
+            for selected_cards_count in range(deck_info.deck_size + 1)
+        ]
+
+        self._tree_size = 1
+        while self._tree_size < len(self.bids):
+            self._tree_size *= 2
+        self._trees = [self._max_tree(probabilities) for probabilities in self._probabilities]
+
+        # the bids sorted by decreasing probability, with the strongest bid among every prefix of them
+        self._by_probability = []
+        for probabilities in self._probabilities:
+            order = sorted(range(len(self.bids)), key=lambda position: -probabilities[position])
+            negated_probabilities = [-probabilities[position] for position in order]
+            strongest = []
+            for position in order:
+                strongest.append(max(position, strongest[-1]) if strongest else position)
+            self._by_probability.append((negated_probabilities, strongest))
+
+    def _hand_bids(self, hand: str) -> list[Bid]:
+        cards_of_rank_count = self.deck_info.cards_of_rank_count
+        cards_of_suit_count = self.deck_info.cards_of_suit_count
+        rank_count = self.deck_info.rank_count
+        suit_count = self.deck_info.suit_count
+        ranks = range(rank_count)
+        windows = range(rank_count - BidLadder.STRAIGHT_LENGTH + 1)
+        of_a_kind = {"highCard": 1, "pair": 2, "threeOfAKind": 3, "fourOfAKind": 4}
+
+        if hand in of_a_kind:
+            if of_a_kind[hand] > cards_of_rank_count:
+                return []
+            return [Bid(hand, (rank,), None, ((of_a_kind[hand], cards_of_rank_count),)) for rank in ranks]
+        if hand == "twoPair":
+            if cards_of_rank_count < 2:
+                return []
+            return [Bid(hand, (high, low), None, ((2, cards_of_rank_count), (2, cards_of_rank_count)))
+                    for high in ranks for low in range(high)]
+        if hand == "fullHouse":
+            if cards_of_rank_count < 3:
+                return []
+            return [Bid(hand, (three, two), None, ((3, cards_of_rank_count), (2, cards_of_rank_count)))
+                    for three, two in permutations(ranks, 2)]
+        if hand == "straight":
+            return [Bid(hand, (low,), None, tuple(repeat((1, cards_of_rank_count), BidLadder.STRAIGHT_LENGTH)))
+                    for low in windows]
+        if hand == "flush":
+            if BidLadder.FLUSH_LENGTH > cards_of_suit_count:
+                return []
+            return [Bid(hand, (), suit, ((BidLadder.FLUSH_LENGTH, cards_of_suit_count),)) for suit in range(suit_count)]
+        if hand == "straightFlush":
+            if rank_count * suit_count != self.deck_info.deck_size:
+                return []
+            return [Bid(hand, (low,), suit, tuple(repeat((1, 1), BidLadder.STRAIGHT_LENGTH)))
+                    for low in windows for suit in range(suit_count)]
+        raise ValueError(f"Unknown hand {hand}")
+
+    def _max_tree(self, probabilities: list[float]) -> list[float]:
+        tree = [float("-inf")] * (2 * self._tree_size)
+        tree[self._tree_size:self._tree_size + len(probabilities)] = probabilities
+        for node in range(self._tree_size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        return tree
+
+    def _first_at_least(self, tree: list[float], node: int, node_start: int, node_end: int, start: int,
+                        probability: float) -> int | None:
+        """
+        Returns the first position of at least start within the node whose probability reaches the threshold.
+        """
+        if node_end <= start or tree[node] < probability:
+            return None
+        if node_end - node_start == 1:
+            return node_start
+        middle = (node_start + node_end) // 2
+        position = self._first_at_least(tree, 2 * node, node_start, middle, start, probability)
+        if position is None:
+            position = self._first_at_least(tree, 2 * node + 1, middle, node_end, start, probability)
+        return position
+
+    def position(self, bid: Bid) -> int:
+        """
+        Returns the position of the bid in the bid order.
+        """
+        return self._positions[bid]
+
+    def probability(self, bid: Bid, selected_cards_count: int) -> float:
+        """
+        Returns the probability of the bid when the specified number of cards are on the table.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        return self._probabilities[selected_cards_count][self._positions[bid]]
+
+    def next_bid(self, bid: Bid | None, probability: float, selected_cards_count: int) -> Bid | None:
+        """
+        Returns the weakest bid above the specified one whose probability is at least the threshold.
+
+        :param bid: The last bid, or None to search from the weakest bid.
+        :param probability: The probability threshold.
+        :param selected_cards_count: The number of cards on the table.
+        :return: The bid, or None if no stronger bid reaches the threshold.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        start = 0 if bid is None else self._positions[bid] + 1
+        position = self._first_at_least(self._trees[selected_cards_count], 1, 0, self._tree_size, start, probability)
+        return None if position is None else self.bids[position]
+
+    def strongest_bid(self, probability: float, selected_cards_count: int) -> Bid | None:
+        """
+        Returns the strongest bid whose probability is at least the threshold.
+
+        :return: The bid, or None if no bid reaches the threshold.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        negated_probabilities, strongest = self._by_probability[selected_cards_count]
+        count = bisect_right(negated_probabilities, -probability)
+        return self.bids[strongest[count - 1]] if count else None
+
+    def count_at_least(self, probability: float, selected_cards_count: int) -> int:
+        """
+        Returns the number of bids whose probability is at least the threshold.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        return bisect_right(self._by_probability[selected_cards_count][0], -probability)
@@ -0,0 +1,190 @@
+from collections.abc import Iterable
+from hand_probability import DeckInfo, CardRequirement, check_selected_cards_count
+
+
+class CardSetRequirement:
+    """
+    Represents a requirement that specifies a minimum amount of cards from an explicit set of cards that are present
+    among randomly selected cards from a deck. Unlike CardRequirement, the sets of different requirements
+    may overlap.
+
+    :ivar at_least: The minimum number of cards required.
+    :type at_least: int
+    :ivar cards: The indices of the considered cards in the deck.
+    :type cards: frozenset[int]
+
+    Example:
+        CardSetRequirement(5, probability.suit(0)) and CardSetRequirement(1, {probability.card(5, 0)})
+        together represent a flush of the first suit that contains its highest card.
+    """
+    def __init__(self, at_least: int, cards: Iterable[int]):
+        self.cards = frozenset(cards)
+        if at_least < 0:
+            raise ValueError("at_least must be non-negative")
+        if at_least > len(self.cards):
+            raise ValueError("at_least must be less than or equal to the number of cards")
+        self.at_least = at_least
+
+
+def consecutive_card_sets(deck_info: DeckInfo, *card_requirements: CardRequirement) -> list[CardSetRequirement]:
+    """
+    Returns the card set requirements of a hand described by disjoint CardRequirement objects, the way
+    HandProbability.create_probability_func() describes it. Requirement i affects the cards following
+    the cards of requirement i - 1.
+    """
+    card_set_requirements = []
+    first_card = 0
+    for requirement in card_requirements:
+        card_set_requirements.append(
+            CardSetRequirement(requirement.at_least, range(first_card, first_card + requirement.out_of))
+        )
+        first_card += requirement.out_of
+    if first_card > deck_info.deck_size:
+        raise ValueError("Requirements affect more cards than the deck contains")
+    return card_set_requirements
+
+
+class CardSetProbabilityFunction:
+    """
+    Function that calculates the probability of a hand described by possibly overlapping card set requirements
+    based on the number of cards selected from the deck.
+
+    :ivar count_polynomial: The number of ways to select exactly t of the cards affected by the requirements
+        so that every requirement is satisfied, indexed by t.
+    :type count_polynomial: list[int]
+    """
+    def __init__(self, deck_info: DeckInfo, count_polynomial: list[int], covered_cards_count: int,
+                 digits_of_precision: int | None):
+        self._deck_info = deck_info
+        self.count_polynomial = count_polynomial
+        self._rest_size = deck_info.deck_size - covered_cards_count
+        self._digits_of_precision = digits_of_precision
+
+    def numerator(self, selected_cards_count: int) -> int:
+        """
+        Returns the exact number of selections of the specified number of cards that contain the hand.
+        """
+        check_selected_cards_count(selected_cards_count, self._deck_info.deck_size)
+        binomial_table = self._deck_info.binomial_table
+        return sum(
+            ways * binomial_table.comb(self._rest_size, selected_cards_count - count)
+            for count, ways in enumerate(self.count_polynomial[:selected_cards_count + 1])
+        )
+
+    def __call__(self, selected_cards_count: int) -> float:
+        probability = (self.numerator(selected_cards_count)
+                       / self._deck_info.binomial_table.comb(self._deck_info.deck_size, selected_cards_count))
+        return probability if self._digits_of_precision is None else round(probability, self._digits_of_precision)
+
+    def curve(self) -> list[float]:
+        """
+        Returns the probabilities for every number of selected cards from 0 to the deck size.
+        """
+        return [self(selected_cards_count) for selected_cards_count in range(self._deck_info.deck_size + 1)]
+
+
+class CardSetProbability:
+    """
+    Provides methods for calculating the probability of hands whose requirements refer to overlapping sets of cards,
+    such as a pair of kings together with 4 spades.
+
+    The deck is partitioned into atoms, the groups of cards affected by exactly the same requirements.
+    A dynamic program then adds one atom at a time, keeping for every requirement the number of its cards
+    selected so far capped at its minimum, so the running time is polynomial in the atom sizes.
+
+    Cards are numbered from 0 to deck_size - 1. When every combination of a rank and a suit is a unique card,
+    rank(), suit() and card() return the indices of the cards of a rank, of a suit and of a single card.
+
+    :ivar deck_info: The information related to the deck being utilized.
+    :type deck_info: DeckInfo
+    :ivar digits_of_precision: The number of decimal places to which probabilities are rounded.
+        If None, probabilities are not rounded.
+    :type digits_of_precision: int | None
+    """
+    def __init__(self, deck_info: DeckInfo, digits_of_precision: int | None = None):
+        self.deck_info = deck_info
+        self.digits_of_precision = digits_of_precision
+
+    @property
+    def _suit_count(self) -> int:
+        self.deck_info.check_classes()
+        if self.deck_info.rank_count * self.deck_info.suit_count != self.deck_info.deck_size:
+            raise ValueError("Every combination of a rank and a suit must be a unique card in the deck")
+        return self.deck_info.suit_count
+
+    def card(self, rank: int, suit: int) -> int:
+        """
+        Returns the index of the card of the specified rank and suit.
+        """
+        if not 0 <= suit < self._suit_count or not 0 <= rank < self.deck_info.rank_count:
+            raise ValueError("Rank or suit out of range")
+        return rank * self._suit_count + suit
+
+    def rank(self, rank: int) -> frozenset[int]:
+        """
+        Returns the indices of all cards of the specified rank.
+        """
+        return frozenset(self.card(rank, suit) for suit in range(self._suit_count))
+
+    def suit(self, suit: int) -> frozenset[int]:
+        """
+        Returns the indices of all cards of the specified suit.
+        """
+        return frozenset(self.card(rank, suit) for rank in range(self.deck_info.rank_count))
+
+    def atoms(self, *card_set_requirements: CardSetRequirement) -> dict[frozenset[int], int]:
+        """
+        Returns the sizes of the atoms formed by the requirements, keyed by the indices of the requirements
+        that affect the cards of the atom. Cards not affected by any requirement are not included.
+        """
+        atoms = {}
+        for requirement in card_set_requirements:
+            if any(not 0 <= card < self.deck_info.deck_size for card in requirement.cards):
+                raise ValueError("Card indices must be between 0 and deck_size - 1")
+        for card in set().union(*(requirement.cards for requirement in card_set_requirements)):
+            members = frozenset(i for i, requirement in enumerate(card_set_requirements) if card in requirement.cards)
+            atoms[members] = atoms.get(members, 0) + 1
+        return atoms
+
+    def create_probability_func(self, *card_set_requirements: CardSetRequirement) -> CardSetProbabilityFunction:
+        """
+        Returns a function that calculates the probability of a hand described by the specified requirements.
+        The sets of cards of the requirements may overlap.
+
+        :param card_set_requirements: Requirements for the hand.
+        :return: A function that calculates the probability of having the hand based on the number
+            of selected cards.
+
+        Example:
+            To calculate the probability of a pair of kings and 4 spades (rank 4 and suit 0) call this function
+            as follows:
+
+            probability = CardSetProbability(deck_info)
+            func = probability.create_probability_func(
+                CardSetRequirement(2, probability.rank(4)), CardSetRequirement(4, probability.suit(0))
+            )
+        """
+        atoms = self.atoms(*card_set_requirements)
+        binomial_table = self.deck_info.binomial_table
+        minimums = tuple(requirement.at_least for requirement in card_set_requirements)
+
+        # state: selected cards of every requirement capped at its minimum -> polynomial by selected covered cards
+        states = {(0,) * len(minimums): [1]}
+        for members, atom_size in atoms.items():
+            next_states = {}
+            for state, polynomial in states.items():
+                for count in range(atom_size + 1):
+                    ways = binomial_table.comb(atom_size, count)
+                    next_state = tuple(
+                        min(selected + count, minimum) if i in members else selected
+                        for i, (selected, minimum) in enumerate(zip(state, minimums))
+                    )
+                    next_polynomial = next_states.setdefault(next_state, [])
+                    if len(next_polynomial) < len(polynomial) + count:
+                        next_polynomial.extend([0] * (len(polynomial) + count - len(next_polynomial)))
+                    for selected_count, polynomial_ways in enumerate(polynomial):
+                        next_polynomial[selected_count + count] += polynomial_ways * ways
+            states = next_states
+
+        return CardSetProbabilityFunction(self.deck_info, states.get(minimums, [0]), sum(atoms.values()),
+                                          self.digits_of_precision)
@@ -0,0 +1,177 @@
+# Script generating a JSON file with the numbers of cards on the table at which one poker hand becomes more probable
+# than another, for every pair of hands, so that reasoning about the order of bids does not need the curves.
+
+from bisect import bisect_right
+from hand_probability import DeckInfo, HandProbability, ProbabilityFunction, check_selected_cards_count
+import json
+import numpy as np
+
+OUTPUT_FILE_NAME: str = "crossover_index.json"
+
+
+def hand_category_functions(hand_probability: HandProbability) -> dict[str, ProbabilityFunction]:
+    """
+    Returns the functions of the specific hands (e.g. "a pair of jacks") of every hand category
+    keyed by the names used in probability_data.json.
+    """
+    return {
+        "highCard": hand_probability.at_least_of_ranks_probability_function(1),
+        "pair": hand_probability.at_least_of_ranks_probability_function(2),
+        "twoPair": hand_probability.at_least_of_ranks_probability_function(2, 2),
+        "straight": hand_probability.at_least_of_ranks_probability_function(1, 1, 1, 1, 1),
+        "threeOfAKind": hand_probability.at_least_of_ranks_probability_function(3),
+        "fullHouse": hand_probability.at_least_of_ranks_probability_function(3, 2),
+        "flush": hand_probability.at_least_of_suits_probability_function(5),
+        "fourOfAKind": hand_probability.at_least_of_ranks_probability_function(4),
+        "straightFlush": hand_probability.unique_cards_probability_function(5),
+    }
+
+
+class CrossoverIndex:
+    """
+    The order of the probabilities of every pair of hands for every number of selected cards,
+    stored as the numbers of cards at which the order changes.
+
+    The index is computed from the whole curves of all hands at once: the signs of the differences of every pair
+    of curves form a hands x hands x table sizes array, and the positions where the signs change are found
+    in a single vectorized pass.
+
+    :ivar deck_info: The deck the probabilities were calculated for.
+    :type deck_info: DeckInfo
+    :ivar hands: The names of the hands in the order of the index.
+    :type hands: list[str]
+
+    Example:
+        index = CrossoverIndex.from_hand_probability(HandProbability(deck_info))
+        index.crossovers("flush", "fullHouse")
+
+        returns the numbers of cards on the table at which a flush and a full house swap places
+    """
+    def __init__(self, deck_info: DeckInfo, hands: list[str],
+                 order_changes: dict[tuple[int, int], tuple[list[int], list[int]]]):
+        """
+        :param deck_info: The deck the probabilities were calculated for.
+        :param hands: The names of the hands.
+        :param order_changes: For every pair of hand indices i < j, the numbers of selected cards at which
+            the sign of the difference of their probabilities changes, starting with 0, and the signs from
+            those numbers on: 1 if hand i is more probable, -1 if hand j is and 0 if they are equally probable.
+        """
+        self.deck_info = deck_info
+        self.hands = hands
+        self._indices = {hand: i for i, hand in enumerate(hands)}
+        self._order_changes = order_changes
+
+    @classmethod
+    def from_curves(cls, deck_info: DeckInfo, curves: dict[str, list[float]]) -> "CrossoverIndex":
+        """
+        Builds the index from the probabilities of every hand for every number of selected cards
+        from 0 to the deck size.
+        """
+        hands = list(curves)
+        probabilities = np.array([curves[hand] for hand in hands], dtype=np.float64)
+        signs = np.sign(probabilities[:, np.newaxis, :] - probabilities[np.newaxis, :, :]).astype(np.int8)
+        first_hands, second_hands, selected_cards_counts = np.nonzero(signs[:, :, 1:] != signs[:, :, :-1])
+
+        order_changes = {
+            (i, j): ([0], [int(signs[i, j, 0])])
+            for i in range(len(hands)) for j in range(i + 1, len(hands))
+        }
+        for i, j, selected_cards_count in zip(first_hands.tolist(), second_hands.tolist(),
+                                              (selected_cards_counts + 1).tolist()):
+            if i < j:
+                numbers, pair_signs = order_changes[(i, j)]
+                numbers.append(selected_cards_count)
+                pair_signs.append(int(signs[i, j, selected_cards_count]))
+        return cls(deck_info, hands, order_changes)
+
+    @classmethod
+    def from_hand_probability(cls, hand_probability: HandProbability,
+                              funcs: dict[str, ProbabilityFunction] | None = None) -> "CrossoverIndex":
+        """
+        Builds the index of the specified hands, by default of hand_category_functions().
+        """
+        if funcs is None:
+            funcs = hand_category_functions(hand_probability)
+        return cls.from_curves(hand_probability.deck_info, {hand: func.curve() for hand, func in funcs.items()})
+
+    def _pair(self, first_hand: str, second_hand: str) -> tuple[list[int], list[int], int]:
+        i, j = self._indices[first_hand], self._indices[second_hand]
+        if i == j:
+            raise ValueError("The hands must differ")
+        numbers, signs = self._order_changes[(min(i, j), max(i, j))]
+        return numbers, signs, 1 if i < j else -1
+
+    def compare(self, first_hand: str, second_hand: str, selected_cards_count: int) -> int:
+        """
+        Returns 1 if the first hand is more probable than the second one when the specified number of cards
+        is selected, -1 if it is less probable and 0 if they are equally probable.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        numbers, signs, orientation = self._pair(first_hand, second_hand)
+        return orientation * signs[bisect_right(numbers, selected_cards_count) - 1]
+
+    def crossovers(self, first_hand: str, second_hand: str) -> list[int]:
+        """
+        Returns the numbers of selected cards from which the more probable of the two hands differs
+        from the one before, ignoring the numbers at which the hands are equally probable.
+        """
+        numbers, signs, _ = self._pair(first_hand, second_hand)
+        crossovers = []
+        previous_sign = 0
+        for selected_cards_count, sign in zip(numbers, signs):
+            if sign:
+                if previous_sign and sign != previous_sign:
+                    crossovers.append(selected_cards_count)
+                previous_sign = sign
+        return crossovers
+
+    def to_dict(self) -> dict:
+        """
+        Returns the index as a JSON-serializable dictionary together with the deck parameters.
+        """
+        return {
+            "deckInfo": {
+                "deckSize": self.deck_info.deck_size,
+                "cardsOfRankCount": self.deck_info.cards_of_rank_count,
+                "cardsOfSuitCount": self.deck_info.cards_of_suit_count,
+            },
+            "hands": self.hands,
+            "orderChanges": [
+                [i, j, numbers, signs] for (i, j), (numbers, signs) in self._order_changes.items()
+            ],
+            "crossovers": {
+                first_hand: {
+                    second_hand: self.crossovers(first_hand, second_hand)
+                    for second_hand in self.hands[i + 1:]
+                }
+                for i, first_hand in enumerate(self.hands)
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CrossoverIndex":
+        """
+        Restores an index returned by to_dict().
+        """
+        deck_info = DeckInfo(data["deckInfo"]["deckSize"], data["deckInfo"]["cardsOfRankCount"],
+                             data["deckInfo"]["cardsOfSuitCount"])
+        order_changes = {(i, j): (numbers, signs) for i, j, numbers, signs in data["orderChanges"]}
+        return cls(deck_info, data["hands"], order_changes)
+
+
+def main():
+    deck_info = DeckInfo(deck_size=24, cards_of_rank_count=4, cards_of_suit_count=6)
+    index = CrossoverIndex.from_hand_probability(HandProbability(deck_info))
+
+    with open(OUTPUT_FILE_NAME, "w") as f:
+        json.dump(index.to_dict(), f)
+
+    for i, first_hand in enumerate(index.hands):
+        for second_hand in index.hands[i + 1:]:
+            crossovers = index.crossovers(first_hand, second_hand)
+            if crossovers:
+                print(f"{first_hand} / {second_hand}: {crossovers}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+# Script enumerating every selection of cards from a small deck to verify the exact probabilities
+# of the hand_probability module by brute force.
+
+from card_set_probability import CardSetRequirement, consecutive_card_sets
+from concurrent.futures import ProcessPoolExecutor
+from hand_category_probability import HandCategoryProbability
+from hand_probability import DeckInfo, HandProbability, CardRequirement, check_selected_cards_count
+from math import comb
+from time import perf_counter
+from typing import NamedTuple
+import argparse
+
+
+class EnumerationResult(NamedTuple):
+    """
+    Result of an exhaustive enumeration of the selections of a number of cards.
+
+    :ivar hits: The number of selections containing the hand.
+    :ivar subsets: The number of enumerated selections.
+    :ivar seconds: The wall-clock time of the enumeration.
+    """
+    hits: int
+    subsets: int
+    seconds: float
+
+    @property
+    def probability(self) -> float:
+        return self.hits / self.subsets
+
+    @property
+    def subsets_per_second(self) -> float:
+        return self.subsets / self.seconds if self.seconds else float("inf")
+
+
+class BitmaskCardSetsPredicate:
+    """
+    Checks that every card set requirement is satisfied by a selection of cards given as a bitmask.
+    The sets may overlap.
+    """
+    def __init__(self, *card_set_requirements: CardSetRequirement):
+        self.requirements = tuple(
+            (sum(1 << card for card in requirement.cards), requirement.at_least)
+            for requirement in card_set_requirements
+        )
+
+    def __call__(self, selection: int) -> bool:
+        return all((selection & mask).bit_count() >= at_least for mask, at_least in self.requirements)
+
+
+class AnyOfClassesPredicate:
+    """
+    Checks that distinct classes (ranks or suits) with at least the specified numbers of cards are selected,
+    e.g. any full house when the classes are the rank masks of ExhaustiveEnumerator.
+    """
+    def __init__(self, class_masks: list[int], *at_least_of_classes: int):
+        self.class_masks = tuple(class_masks)
+        self.at_least = sorted(at_least_of_classes, reverse=True)
+
+    def __call__(self, selection: int) -> bool:
+        counts = sorted(((selection & mask).bit_count() for mask in self.class_masks), reverse=True)
+        return len(self.at_least) <= len(counts) and all(
+            count >= at_least for count, at_least in zip(counts, self.at_least)
+        )
+
+
+class UnionPredicate:
+    """
+    Checks that at least one of the predicates holds, e.g. a flush or a full house.
+    """
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def __call__(self, selection: int) -> bool:
+        return any(predicate(selection) for predicate in self.predicates)
+
+
+def _subsets(selected_count: int, bits: int):
+    """
+    Yields every bitmask of the specified width with the specified number of set bits in increasing order
+    using Gosper's hack.
+    """
+    if selected_count == 0:
+        yield 0
+        return
+    selection = (1 << selected_count) - 1
+    limit = 1 << bits
+    while selection < limit:
+        yield selection
+        lowest = selection & -selection
+        ripple = selection + lowest
+        selection = (((ripple ^ selection) >> 2) // lowest) | ripple
+
+
+def _count_with_prefix(predicate, prefix: int, low_bits: int, low_selected_count: int) -> int:
+    return sum(1 for low in _subsets(low_selected_count, low_bits) if predicate(prefix | low))
+
+
+class ExhaustiveEnumerator:
+    """
+    Calculates exact probabilities by enumerating every selection of cards from the deck.
+
+    Selections are bitmasks iterated with Gosper's hack, and the cards of a requirement, rank or suit
+    are counted by the popcount of the selection masked by the precomputed mask of its cards. The work
+    is split across processes by the top prefix_bits bits of the selections. Cards are numbered as described
+    by DeckInfo.
+
+    :ivar deck_info: The information related to the deck being utilized.
+    :type deck_info: DeckInfo
+    :ivar rank_masks: The bitmask of the cards of every rank.
+    :type rank_masks: list[int]
+    :ivar suit_masks: The bitmask of the cards of every suit.
+    :type suit_masks: list[int]
+    :ivar jobs: The number of worker processes.
+    :type jobs: int
+    """
+    MAX_DECK_SIZE = 28
+
+    def __init__(self, deck_info: DeckInfo, jobs: int = 1, prefix_bits: int = 8):
+        if deck_info.deck_size > ExhaustiveEnumerator.MAX_DECK_SIZE:
+            raise ValueError(f"deck_size must not exceed {ExhaustiveEnumerator.MAX_DECK_SIZE}")
+        deck_info.check_classes()
+        self.deck_info = deck_info
+        self.jobs = jobs
+        self._prefix_bits = min(prefix_bits, deck_info.deck_size)
+
+        self.rank_masks = [0] * deck_info.rank_count
+        self.suit_masks = [0] * deck_info.suit_count
+        for card in range(deck_info.deck_size):
+            self.rank_masks[deck_info.rank_of(card)] |= 1 << card
+            self.suit_masks[deck_info.suit_of(card)] |= 1 << card
+
+    def any_of_ranks(self, *at_least_of_ranks: int) -> AnyOfClassesPredicate:
+        """
+        Returns a predicate of at least the specified numbers of cards of any distinct ranks.
+        """
+        return AnyOfClassesPredicate(self.rank_masks, *at_least_of_ranks)
+
+    def any_of_suits(self, *at_least_of_suits: int) -> AnyOfClassesPredicate:
+        """
+        Returns a predicate of at least the specified numbers of cards of any distinct suits.
+        """
+        return AnyOfClassesPredicate(self.suit_masks, *at_least_of_suits)
+
+    def card_requirements(self, *card_requirements: CardRequirement) -> BitmaskCardSetsPredicate:
+        """
+        Returns a predicate of a hand described by disjoint CardRequirement objects laid out on the cards
+        by card_set_probability.consecutive_card_sets().
+        """
+        return BitmaskCardSetsPredicate(*consecutive_card_sets(self.deck_info, *card_requirements))
+
+    def count(self, predicate, selected_cards_count: int) -> EnumerationResult:
+        """
+        Counts the selections of the specified number of cards for which the predicate holds.
+
+        :param predicate: Callable taking the bitmask of the selected cards and returning whether it contains
+            the hand. It must be picklable when jobs is greater than 1.
+        :param selected_cards_count: The number of cards selected from the deck.
+        :return: The number of hits, the number of enumerated selections and the time it took.
+        """
+        deck_size = self.deck_info.deck_size
+        check_selected_cards_count(selected_cards_count, deck_size)
+        low_bits = deck_size - self._prefix_bits
+        tasks = [
+            (prefix_selection << low_bits, selected_cards_count - prefix_selected_count)
+            for prefix_selected_count in range(min(selected_cards_count, self._prefix_bits) + 1)
+            if selected_cards_count - prefix_selected_count <= low_bits
+            for prefix_selection in _subsets(prefix_selected_count, self._prefix_bits)
+        ]
+
+        start = perf_counter()
+        if self.jobs > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                hits = sum(executor.map(_count_with_prefix, [predicate] * len(tasks),
+                                        [prefix for prefix, _ in tasks], [low_bits] * len(tasks),
+                                        [low_selected_count for _, low_selected_count in tasks],
+                                        chunksize=max(len(tasks) // (4 * self.jobs), 1)))
+        else:
+            hits = sum(_count_with_prefix(predicate, prefix, low_bits, low_selected_count)
+                       for prefix, low_selected_count in tasks)
+        return EnumerationResult(hits, comb(deck_size, selected_cards_count), perf_counter() - start)
+
+    def compare(self, hand_probability: HandProbability, *card_requirements: CardRequirement,
+                selected_cards_counts: range | None = None) -> list[tuple[int, int, EnumerationResult]]:
+        """
+        Compares the exact numerators of create_probability_func() with the enumerated numbers of selections.
+
+        :return: (selected cards count, numerator, enumeration result) triples. The numerator equals
+            the number of hits of a correct formula.
+        """
+        if selected_cards_counts is None:
+            selected_cards_counts = range(self.deck_info.deck_size + 1)
+        func = hand_probability.create_probability_func(*card_requirements)
+        predicate = self.card_requirements(*card_requirements)
+        return [
+            (selected_cards_count, func.numerator(selected_cards_count), self.count(predicate, selected_cards_count))
+            for selected_cards_count in selected_cards_counts
+        ]
+
+    def compare_categories(self, hand_category_probability: HandCategoryProbability,
+                           categories: dict[str, tuple[int, ...]], selected_cards_counts: range | None = None
+                           ) -> list[tuple[str, int, float, EnumerationResult]]:
+        """
+        Compares the probabilities of HandCategoryProbability.category_curves() with the enumerated probabilities
+        of any_of_ranks() predicates.
+
+        :param categories: The minimum numbers of cards of distinct ranks of every category keyed by its name.
+        :return: (category name, selected cards count, probability, enumeration result) quadruples.
+            The probability equals the enumerated one of a correct formula.
+        """
+        if selected_cards_counts is None:
+            selected_cards_counts = range(self.deck_info.deck_size + 1)
+        curves = hand_category_probability.category_curves(categories)
+        return [
+            (name, selected_cards_count, curves[name][selected_cards_count],
+             self.count(self.any_of_ranks(*at_least_of_ranks), selected_cards_count))
+            for name, at_least_of_ranks in categories.items()
+            for selected_cards_count in selected_cards_counts
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--selected", type=int, default=None,
+                        help="only enumerate selections of this number of cards (default: all)")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    deck_info = DeckInfo(deck_size=24, cards_of_rank_count=4, cards_of_suit_count=6)
+    hand_probability = HandProbability(deck_info)
+    enumerator = ExhaustiveEnumerator(deck_info, jobs=args.jobs)
+    if args.selected is None:
+        selected_cards_counts = range(1, deck_info.deck_size)
+    else:
+        selected_cards_counts = range(args.selected, args.selected + 1)
+
+    hands = {
+        "pair": (CardRequirement(2, 4),),
+        "full house": (CardRequirement(3, 4), CardRequirement(2, 4)),
+        "straight": tuple(CardRequirement(1, 4) for _ in range(5)),
+        "flush": (CardRequirement(5, 6),),
+    }
+    mismatches = 0
+    subsets = 0
+    seconds = 0.0
+    for name, card_requirements in hands.items():
+        for selected_cards_count, numerator, result in enumerator.compare(
+                hand_probability, *card_requirements, selected_cards_counts=selected_cards_counts):
+            mismatches += numerator != result.hits
+            subsets += result.subsets
+            seconds += result.seconds
+            print(f"{name:>10} n={selected_cards_count:>2} numerator={numerator} enumerated={result.hits} "
+                  f"{result.subsets_per_second:,.0f} subsets/s")
+    print(f"{mismatches} mismatching numerators, {subsets / seconds:,.0f} subsets/s overall")
+
+    categories = {
+        "any pair": (2,),
+        "any full house": (3, 2),
+        "any pair and another rank": (2, 0),
+    }
+    category_mismatches = 0
+    for name, selected_cards_count, probability, result in enumerator.compare_categories(
+            HandCategoryProbability(deck_info), categories, selected_cards_counts):
+        category_mismatches += probability != result.probability
+        print(f"{name:>25} n={selected_cards_count:>2} probability={probability:.6f} "
+              f"enumerated={result.probability:.6f}")
+    print(f"{category_mismatches} mismatching category probabilities")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+from hand_probability import DeckInfo, multiply_polynomials
+
+
+def _add_polynomials(a: list[int], b: list[int]) -> list[int]:
+    if len(a) < len(b):
+        a, b = b, a
+    return [coefficient + (b[i] if i < len(b) else 0) for i, coefficient in enumerate(a)]
+
+
+class HandCategoryProbability:
+    """
+    Provides methods for calculating the probability that any hand of a category (e.g. any pair) is present
+    among cards randomly selected from the deck, as opposed to HandProbability that handles specific hands
+    (e.g. a pair of jacks).
+
+    Rank and suit categories are calculated from the distribution of rank (or suit) multiplicity profiles,
+    i.e. the number of ranks that appear exactly 0, 1, ..., DeckInfo.cards_of_rank_count times among the selected
+    cards. The distribution is built by a dynamic program that adds one rank at a time, so its size is polynomial
+    in the number of ranks and it covers every number of selected cards at once.
+
+    Straights and straight flushes are calculated by a transfer-matrix dynamic program over consecutive ranks
+    that counts the selections without any complete run of ranks, so overlapping rank windows are handled exactly.
+    Ranks are assumed to be ordered without wrapping around.
+
+    :ivar deck_info: The information related to the deck being utilized.
+    :type deck_info: DeckInfo
+    :ivar digits_of_precision: The number of decimal places to which probabilities are rounded.
+        If None, probabilities are not rounded.
+    :type digits_of_precision: int | None
+    """
+    RANK_CATEGORIES = {
+        "pair": (2,),
+        "twoPair": (2, 2),
+        "threeOfAKind": (3,),
+        "fullHouse": (3, 2),
+        "fourOfAKind": (4,),
+    }
+
+    def __init__(self, deck_info: DeckInfo, digits_of_precision: int | None = None):
+        deck_info.check_classes()
+        self.deck_info = deck_info
+        self.digits_of_precision = digits_of_precision
+        self._rank_profiles: dict[tuple[int, ...], int] | None = None
+        self._suit_profiles: dict[tuple[int, ...], int] | None = None
+
+    def rank_profile_distribution(self) -> dict[tuple[int, ...], int]:
+        """
+        Returns the number of ways to select cards from the deck for every rank multiplicity profile.
+
+        A profile is a tuple whose element at index j is the number of ranks that appear exactly j times
+        among the selected cards. The number of selected cards of a profile is the sum of j times its element j.
+        """
+        if self._rank_profiles is None:
+            self._rank_profiles = self._profile_distribution(self.deck_info.rank_count,
+                                                             self.deck_info.cards_of_rank_count)
+        return self._rank_profiles
+
+    def suit_profile_distribution(self) -> dict[tuple[int, ...], int]:
+        """
+        Returns the number of ways to select cards from the deck for every suit multiplicity profile.
+
+        A profile is a tuple whose element at index j is the number of suits that appear exactly j times
+        among the selected cards.
+        """
+        if self._suit_profiles is None:
+            self._suit_profiles = self._profile_distribution(self.deck_info.suit_count,
+                                                             self.deck_info.cards_of_suit_count)
+        return self._suit_profiles
+
+    def any_of_ranks_curve(self, *at_least_of_ranks: int) -> list[float]:
+        """
+        Returns the probabilities of selecting at least the specified numbers of cards of any distinct ranks
+        for every number of selected cards from 0 to the deck size.
+
+        :param at_least_of_ranks: The number of cards of each rank to be selected.
+        :return: The probabilities indexed by the number of selected cards.
+
+        Example:
+            To calculate the probability of any full house call this function as follows:
+
+            curve = HandCategoryProbability(deck_info).any_of_ranks_curve(3, 2)
+
+            curve[12] returns the probability of any full house when 12 random cards are selected from the deck
+        """
+        return self.category_curves({"hand": at_least_of_ranks})["hand"]
+
+    def category_curves(self, categories: dict[str, tuple[int, ...]] | None = None) -> dict[str, list[float]]:
+        """
+        Returns the probabilities of every specified hand category for every number of selected cards
+        from 0 to the deck size, computed in a single pass over the rank profile distribution.
+
+        :param categories: The minimum numbers of cards of distinct ranks of every category keyed by its name.
+            Defaults to RANK_CATEGORIES.
+        :return: The probabilities indexed by the number of selected cards keyed by the category name.
+        """
+        if categories is None:
+            categories = HandCategoryProbability.RANK_CATEGORIES
+        return self._curves(self.rank_profile_distribution(), categories)
+
+    def any_of_suits_curve(self, *at_least_of_suits: int) -> list[float]:
+        """
+        Returns the probabilities of selecting at least the specified numbers of cards of any distinct suits
+        for every number of selected cards from 0 to the deck size.
+
+        :param at_least_of_suits: The number of cards of each suit to be selected.
+        :return: The probabilities indexed by the number of selected cards.
+
+        Example:
+            To calculate the probability of a flush in any suit call this function as follows:
+
+            curve = HandCategoryProbability(deck_info).any_of_suits_curve(5)
+        """
+        return self._curves(self.suit_profile_distribution(), {"hand": at_least_of_suits})["hand"]
+
+    def any_straight_curve(self, length: int = 5) -> list[float]:
+        """
+        Returns the probabilities of selecting at least one card of each of the specified number of consecutive
+        ranks, in any rank window, for every number of selected cards from 0 to the deck size.
+
+        :param length: The number of consecutive ranks of the straight.
+        :return: The probabilities indexed by the number of selected cards.
+        """
+        binomial_table = self.deck_info.binomial_table
+        cards_of_rank_count = self.deck_info.cards_of_rank_count
+        rank_present = [0] + [binomial_table.comb(cards_of_rank_count, count)
+                              for count in range(1, cards_of_rank_count + 1)]
+        without_straight = self._without_run_polynomial(self.deck_info.rank_count, rank_present, [1], length)
+        return self._complement_curve(without_straight, self.deck_info.deck_size)
+
+    def any_straight_flush_curve(self, length: int = 5, suits: int | None = None) -> list[float]:
+        """
+        Returns the probabilities of selecting all cards of the specified number of consecutive ranks of a single
+        suit, in any rank window and any of the considered suits, for every number of selected cards
+        from 0 to the deck size.
+
+        Every combination of a rank and a suit must be a unique card in the deck.
+
+        :param length: The number of consecutive ranks of the straight flush.
+        :param suits: The number of suits considered. Defaults to all suits of the deck.
+        :return: The probabilities indexed by the number of selected cards.
+        """
+        if self.deck_info.rank_count * self.deck_info.suit_count != self.deck_info.deck_size:
+            raise ValueError("Every combination of a rank and a suit must be a unique card in the deck")
+        if suits is None:
+            suits = self.deck_info.suit_count
+        if not 0 <= suits <= self.deck_info.suit_count:
+            raise ValueError("suits must be between 0 and the number of suits in the deck")
+
+        suit_without_straight_flush = self._without_run_polynomial(self.deck_info.rank_count, [0, 1], [1], length)
+        without_straight_flush = [1]
+        for _ in range(suits):
+            without_straight_flush = multiply_polynomials(without_straight_flush, suit_without_straight_flush)
+        return self._complement_curve(without_straight_flush, suits * self.deck_info.rank_count)
+
+    @staticmethod
+    def _without_run_polynomial(positions: int, present: list[int], absent: list[int], length: int) -> list[int]:
+        """
+        Returns the polynomial, by the number of selected cards, of selections in a row of positions
+        that do not contain the specified number of consecutive present positions.
+
+        The states of the transfer matrix are the lengths of the current run of present positions.
+
+        :param positions: The number of positions in the row.
+        :param present: The polynomial of selections that make a position present.
+        :param absent: The polynomial of selections that make a position absent.
+        :param length: The length of the forbidden run.
+        """
+        if length <= 0:
+            return [0]
+        states = [[1]] + [[0] for _ in range(length - 1)]
+        for _ in range(positions):
+            run_broken = [0]
+            for polynomial in states:
+                run_broken = _add_polynomials(run_broken, polynomial)
+            states = [multiply_polynomials(run_broken, absent)] + [
+                multiply_polynomials(polynomial, present) for polynomial in states[:-1]
+            ]
+        result = [0]
+        for polynomial in states:
+            result = _add_polynomials(result, polynomial)
+        return result
+
+    def _complement_curve(self, without_hand: list[int], covered_cards_count: int) -> list[float]:
+        """
+        Returns the probabilities of the complement of the event described by the polynomial of selections
+        among the covered cards, the rest of the deck being selected freely.
+        """
+        binomial_table = self.deck_info.binomial_table
+        deck_size = self.deck_info.deck_size
+        rest_size = deck_size - covered_cards_count
+        curve = []
+        for selected_cards_count in range(deck_size + 1):
+            without_hand_count = sum(
+                ways * binomial_table.comb(rest_size, selected_cards_count - count)
+                for count, ways in enumerate(without_hand[:selected_cards_count + 1])
+            )
+            total = binomial_table.comb(deck_size, selected_cards_count)
+            curve.append(self._round((total - without_hand_count) / total))
+        return curve
+
+    def _profile_distribution(self, class_count: int, cards_of_class_count: int) -> dict[tuple[int, ...], int]:
+        binomial_table = self.deck_info.binomial_table
+        profiles = {(0,) * (cards_of_class_count + 1): 1}
+        for _ in range(class_count):
+            next_profiles = {}
+            for profile, ways in profiles.items():
+                for multiplicity in range(cards_of_class_count + 1):
+                    next_profile = profile[:multiplicity] + (profile[multiplicity] + 1,) + profile[multiplicity + 1:]
+                    next_profiles[next_profile] = next_profiles.get(next_profile, 0) + ways * binomial_table.comb(
+                        cards_of_class_count, multiplicity
+                    )
+            profiles = next_profiles
+        return profiles
+
+    @staticmethod
+    def _satisfies(profile: tuple[int, ...], at_least: tuple[int, ...]) -> bool:
+        """
+        Checks whether distinct classes of the profile can be assigned to every required number of cards.
+        Assigning the classes with the most cards to the largest requirements first is optimal. Classes without
+        selected cards are included, so a requirement of 0 cards is satisfied by any remaining class.
+        """
+        multiplicities = [
+            multiplicity
+            for multiplicity in range(len(profile) - 1, -1, -1)
+            for _ in range(profile[multiplicity])
+        ]
+        required = sorted(at_least, reverse=True)
+        return len(required) <= len(multiplicities) and all(
+            multiplicity >= k for multiplicity, k in zip(multiplicities, required)
+        )
+
+    def _curves(self, profiles: dict[tuple[int, ...], int],
+                categories: dict[str, tuple[int, ...]]) -> dict[str, list[float]]:
+        deck_size = self.deck_info.deck_size
+        numerators = {name: [0] * (deck_size + 1) for name in categories}
+        for profile, ways in profiles.items():
+            selected_cards_count = sum(multiplicity * count for multiplicity, count in enumerate(profile))
+            for name, at_least in categories.items():
+                if HandCategoryProbability._satisfies(profile, at_least):
+                    numerators[name][selected_cards_count] += ways
+
+        return {
+            name: [self._round(numerator / self.deck_info.binomial_table.comb(deck_size, selected_cards_count))
+                   for selected_cards_count, numerator in enumerate(category_numerators)]
+            for name, category_numerators in numerators.items()
+        }
+
+    def _round(self, probability: float) -> float:
+        return probability if self.digits_of_precision is None else round(probability, self.digits_of_precision)
@@ -1,6 +1,133 @@
-from math import comb, prod
-from collections.abc import Callable
-from itertools import product, repeat
+from math import comb, exp, factorial, fsum, inf, lgamma, log, prod
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from itertools import combinations_with_replacement, product, repeat
+from sys import getsizeof
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional and only needed for array arguments of probability functions
+    np = None
+
+
+class BinomialTable:
+    """
+    Lazily grown Pascal triangle of binomial coefficients.
+
+    Rows are added on demand when a coefficient from a row that has not been computed yet is requested,
+    so every coefficient is computed only once and then shared by all users of the table. Coefficients
+    with n greater than row_limit are not stored and are computed directly instead.
+
+    :ivar row_limit: The largest n stored in the table.
+    :type row_limit: int
+    :ivar hits: The number of coefficients looked up in the table.
+    :type hits: int
+    :ivar misses: The number of coefficients computed directly because n exceeded row_limit.
+    :type misses: int
+    """
+    def __init__(self, row_limit: int = 256):
+        self._rows = [[1]]
+        self.row_limit = row_limit
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_n(self) -> int:
+        """
+        The largest n for which the coefficients are already computed.
+        """
+        return len(self._rows) - 1
+
+    def reserve(self, max_n: int) -> None:
+        """
+        Computes all rows of the table up to and including row max_n, or up to row_limit if max_n exceeds it,
+        since coefficients of larger n are not stored.
+
+        :param max_n: The largest n for which the coefficients should be available without growing the table.
+        """
+        while len(self._rows) <= min(max_n, self.row_limit):
+            previous_row = self._rows[-1]
+            self._rows.append([1, *(a + b for a, b in zip(previous_row, previous_row[1:])), 1])
+
+    def comb(self, n: int, k: int) -> int:
+        """
+        Returns the number of ways to choose k items from n items, or 0 if k is out of the range [0, n].
+        """
+        if k < 0 or k > n:
+            return 0
+        if n > self.row_limit:
+            self.misses += 1
+            return comb(n, k)
+        if n >= len(self._rows):
+            self.reserve(n)
+        self.hits += 1
+        return self._rows[n][k]
+
+    def memory_usage(self) -> int:
+        """
+        Returns the approximate number of bytes occupied by the table including the stored integers.
+        """
+        return getsizeof(self._rows) + sum(
+            getsizeof(row) + sum(getsizeof(value) for value in row) for row in self._rows
+        )
+
+
+class LogBinomialTable:
+    """
+    Lazily grown table of natural logarithms of factorials used to evaluate logarithms of binomial coefficients
+    without big integer arithmetic.
+
+    :ivar hits: The number of logarithms of binomial coefficients evaluated from the table.
+    :type hits: int
+    """
+    def __init__(self):
+        self._log_factorials = [0.0]
+        self.hits = 0
+
+    def reserve(self, max_n: int) -> None:
+        """
+        Computes the logarithms of factorials up to and including max_n.
+        """
+        self._log_factorials.extend(lgamma(i + 1) for i in range(len(self._log_factorials), max_n + 1))
+
+    def log_comb(self, n: int, k: int) -> float:
+        """
+        Returns the natural logarithm of the number of ways to choose k items from n items,
+        or -inf if k is out of the range [0, n].
+        """
+        if k < 0 or k > n:
+            return -inf
+        if n >= len(self._log_factorials):
+            self.reserve(n)
+        self.hits += 1
+        return self._log_factorials[n] - self._log_factorials[k] - self._log_factorials[n - k]
+
+    def memory_usage(self) -> int:
+        """
+        Returns the approximate number of bytes occupied by the table including the stored floats.
+        """
+        return getsizeof(self._log_factorials) + sum(getsizeof(value) for value in self._log_factorials)
+
+
+def _log_sum_exp(values: list[float]) -> float:
+    maximum = max(values, default=-inf)
+    if maximum == -inf:
+        return -inf
+    return maximum + log(fsum(exp(value - maximum) for value in values))
+
+
+def multiply_polynomials(a: list[int], b: list[int]) -> list[int]:
+    """
+    Returns the product of two polynomials given by their coefficients, the lowest power first.
+    """
+    result = [0] * (len(a) + len(b) - 1)
+    for i, a_coefficient in enumerate(a):
+        if a_coefficient:
+            for j, b_coefficient in enumerate(b):
+                if b_coefficient:
+                    result[i + j] += a_coefficient * b_coefficient
+    return result
 
 
 class DeckInfo:
@@ -17,11 +144,57 @@ class DeckInfo:
     :type cards_of_rank_count: int
     :ivar cards_of_suit_count: Number of cards for each suit in the deck.
     :type cards_of_suit_count: int
+    :ivar binomial_table: Binomial coefficients shared by all probability functions created for the deck.
+        The table grows lazily; call binomial_table.reserve(deck_size) to pre-size it. Rows above its row_limit
+        are not stored, so for larger decks only the rows up to row_limit are pre-sized.
+    :type binomial_table: BinomialTable
+    :ivar log_binomial_table: Logarithms of binomial coefficients shared by all probability functions
+        created for the deck with the log engine.
+    :type log_binomial_table: LogBinomialTable
+
+    Modules that deal individual cards number them from 0 to deck_size - 1, card i having the rank rank_of(i)
+    and the suit suit_of(i), which is also the numbering of CardSetProbability.card().
     """
     def __init__(self, deck_size: int, cards_of_rank_count: int, cards_of_suit_count: int):
         self.deck_size = deck_size
         self.cards_of_rank_count = cards_of_rank_count
         self.cards_of_suit_count = cards_of_suit_count
+        self.binomial_table = BinomialTable()
+        self.log_binomial_table = LogBinomialTable()
+
+    @property
+    def rank_count(self) -> int:
+        """
+        The number of ranks in the deck.
+        """
+        return self.deck_size // self.cards_of_rank_count
+
+    @property
+    def suit_count(self) -> int:
+        """
+        The number of suits in the deck.
+        """
+        return self.deck_size // self.cards_of_suit_count
+
+    def check_classes(self) -> None:
+        """
+        Raises ValueError unless the deck is partitioned into ranks of cards_of_rank_count cards
+        and into suits of cards_of_suit_count cards.
+        """
+        if self.deck_size % self.cards_of_rank_count or self.deck_size % self.cards_of_suit_count:
+            raise ValueError("deck_size must be a multiple of cards_of_rank_count and cards_of_suit_count")
+
+    def rank_of(self, card):
+        """
+        Returns the rank of the card with the specified index, or the ranks of a NumPy array of indices.
+        """
+        return card // self.cards_of_rank_count
+
+    def suit_of(self, card):
+        """
+        Returns the suit of the card with the specified index, or the suits of a NumPy array of indices.
+        """
+        return card % self.suit_count
 
 
 class CardRequirement:
@@ -46,6 +219,730 @@ class CardRequirement:
         self.at_least = at_least
         self.out_of = out_of
 
+    def matched(self, matched_cards: int) -> "CardRequirement":
+        """
+        Returns the requirement for the cards that remain unknown when the specified number of the considered
+        cards is already known (e.g. on your own hand).
+
+        :param matched_cards: The number of known cards among the considered cards.
+        :return: The requirement with out_of reduced by the matched cards and at_least reduced accordingly.
+
+        Example:
+            Holding one jack, CardRequirement(2, 4).matched(1) is CardRequirement(1, 3).
+        """
+        if matched_cards < 0 or matched_cards > self.out_of:
+            raise ValueError("matched_cards must be between 0 and out_of")
+        return CardRequirement(max(self.at_least - matched_cards, 0), self.out_of - matched_cards)
+
+
+class HandSignature(NamedTuple):
+    """
+    Canonical, hashable description of a hand in a specific deck.
+
+    :ivar requirements: Sorted (at_least, out_of) pairs of the requirements of the hand.
+    :type requirements: tuple[tuple[int, int], ...]
+    :ivar deck_size: Total number of cards in the deck.
+    :type deck_size: int
+    :ivar cards_of_rank_count: Number of cards for each rank in the deck.
+    :type cards_of_rank_count: int
+    :ivar cards_of_suit_count: Number of cards for each suit in the deck.
+    :type cards_of_suit_count: int
+    """
+    requirements: tuple[tuple[int, int], ...]
+    deck_size: int
+    cards_of_rank_count: int
+    cards_of_suit_count: int
+
+    @classmethod
+    def of(cls, deck_info: DeckInfo, card_requirements: tuple[CardRequirement, ...]) -> "HandSignature":
+        """
+        Returns the signature of the hand described by the requirements in the deck.
+        """
+        return cls(
+            tuple(sorted((requirement.at_least, requirement.out_of) for requirement in card_requirements)),
+            deck_info.deck_size,
+            deck_info.cards_of_rank_count,
+            deck_info.cards_of_suit_count
+        )
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics of the cache of compiled probability functions.
+    """
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class EvaluationPlan(NamedTuple):
+    """
+    The formulation chosen to calculate the probability of a hand and the estimated number of terms
+    of every formulation.
+    """
+    formulation: str
+    costs: dict[str, int]
+
+
+def check_selected_cards_count(selected_cards_count: int, deck_size: int) -> None:
+    """
+    Raises ValueError unless the number of selected cards is between 0 and the deck size.
+    """
+    if selected_cards_count < 0:
+        raise ValueError("Selected cards count must be non-negative")
+    if selected_cards_count > deck_size:
+        raise ValueError("Selected cards count must be less than or equal to deck size")
+
+
+class ProbabilityFunction:
+    """
+    Compiled function that calculates the probability of a hand based on the number of cards selected from the deck.
+
+    Instances are immutable and picklable, so they can be sent to worker processes or stored in persistent caches.
+    Two instances are equal, and hash equally, when they describe the same hand in the same deck and use the same
+    engine and precision. Probabilities are computed lazily and remembered by the instance.
+
+    :ivar signature: The canonical description of the hand and the deck.
+    :type signature: HandSignature
+    :ivar engine: The algorithm used to calculate the probabilities, one of ENGINES.
+        PRODUCT_ENGINE sums over the combinations of requirement counts, enumerating only sorted count multisets
+        for groups of identical requirements, in the cheapest of FORMULATIONS (see explain()). CONVOLUTION_ENGINE
+        multiplies per-requirement count polynomials, so its cost grows with the sum of the requirement sizes
+        instead of their product. Both return identical results. LOG_ENGINE works like CONVOLUTION_ENGINE
+        with floating-point logarithms instead of big integers, so it scales to decks of 100 000 cards; its results
+        stay within LOG_ENGINE_RELATIVE_ERROR relative error of the exact engines.
+    :type engine: str
+    :ivar digits_of_precision: The number of decimal places to which probabilities are rounded.
+        If None, probabilities are not rounded.
+    :type digits_of_precision: int | None
+    """
+    PRODUCT_ENGINE = "product"
+    CONVOLUTION_ENGINE = "convolution"
+    LOG_ENGINE = "log"
+    ENGINES = (PRODUCT_ENGINE, CONVOLUTION_ENGINE, LOG_ENGINE)
+    LOG_ENGINE_RELATIVE_ERROR = 1e-8
+    DIRECT_FORMULATION = "direct"
+    COMPLEMENT_FORMULATION = "complement"
+    INCLUSION_EXCLUSION_FORMULATION = "inclusion-exclusion"
+    FORMULATIONS = (DIRECT_FORMULATION, COMPLEMENT_FORMULATION, INCLUSION_EXCLUSION_FORMULATION)
+    UNIQUE_CARDS_KERNEL = "unique cards"
+    SINGLE_REQUIREMENT_KERNEL = "single requirement"
+
+    __slots__ = ("signature", "engine", "digits_of_precision", "_hash", "_binomial_table", "_log_binomial_table",
+                 "_tables", "_count_polynomial", "_values", "_curve", "_curve_array", "_kernel")
+
+    def __init__(self, deck_info: DeckInfo, card_requirements: tuple[CardRequirement, ...],
+                 engine: str = PRODUCT_ENGINE, digits_of_precision: int | None = None):
+        """
+        :param deck_info: The deck the probabilities are calculated for. Its binomial tables are shared
+            with the function.
+        :param card_requirements: Requirements for the hand. Cards affected by individual requirements
+            must not overlap.
+        :param engine: The algorithm used to calculate the probabilities, one of ENGINES.
+        :param digits_of_precision: The number of decimal places to which probabilities are rounded.
+        """
+        if engine not in ProbabilityFunction.ENGINES:
+            raise ValueError(f"engine must be one of {ProbabilityFunction.ENGINES}")
+        if sum(requirement.out_of for requirement in card_requirements) > deck_info.deck_size:
+            raise ValueError("Requirements affect more cards than the deck contains; cards affected by individual "
+                             "requirements must not overlap (see card_set_probability for overlapping requirements)")
+        self._initialize(HandSignature.of(deck_info, card_requirements), engine, digits_of_precision,
+                         deck_info.binomial_table, deck_info.log_binomial_table, None, None, {}, None)
+
+    def _initialize(self, signature: HandSignature, engine: str, digits_of_precision: int | None,
+                    binomial_table: BinomialTable, log_binomial_table: LogBinomialTable, tables,
+                    count_polynomial: list[int] | None, values: dict[int, float], curve: tuple[float, ...] | None):
+        object.__setattr__(self, "signature", signature)
+        object.__setattr__(self, "engine", engine)
+        object.__setattr__(self, "digits_of_precision", digits_of_precision)
+        object.__setattr__(self, "_hash", hash((signature, engine, digits_of_precision)))
+        object.__setattr__(self, "_binomial_table", binomial_table)
+        object.__setattr__(self, "_log_binomial_table", log_binomial_table)
+        object.__setattr__(self, "_count_polynomial", count_polynomial)
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_curve", curve)
+        object.__setattr__(self, "_curve_array", None)
+        object.__setattr__(self, "_kernel", self._closed_form_kernel())
+        if tables is None:
+            if engine == ProbabilityFunction.PRODUCT_ENGINE:
+                tables = self._planned_terms(self.explain().formulation)
+            elif engine == ProbabilityFunction.CONVOLUTION_ENGINE:
+                tables = self._exact_count_polynomial()
+            else:
+                tables = self._log_count_polynomial()
+        object.__setattr__(self, "_tables", tables)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProbabilityFunction is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ProbabilityFunction is immutable")
+
+    def __getstate__(self):
+        # The binomial tables are shared with the deck and are not pickled; they are rebuilt lazily when needed.
+        return (self.signature, self.engine, self.digits_of_precision, self._tables, self._count_polynomial,
+                self._values, self._curve)
+
+    def __setstate__(self, state):
+        signature, engine, digits_of_precision, tables, count_polynomial, values, curve = state
+        self._initialize(signature, engine, digits_of_precision, BinomialTable(), LogBinomialTable(), tables,
+                         count_polynomial, values, curve)
+
+    def __eq__(self, other):
+        if not isinstance(other, ProbabilityFunction):
+            return NotImplemented
+        return (self.signature == other.signature and self.engine == other.engine
+                and self.digits_of_precision == other.digits_of_precision)
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        requirements = ", ".join(f"CardRequirement({at_least}, {out_of})"
+                                 for at_least, out_of in self.signature.requirements)
+        return f"ProbabilityFunction({requirements}, deck_size={self.signature.deck_size}, engine={self.engine!r})"
+
+    @property
+    def card_requirements(self) -> tuple[CardRequirement, ...]:
+        """
+        The requirements of the hand in canonical order.
+        """
+        return tuple(CardRequirement(at_least, out_of) for at_least, out_of in self.signature.requirements)
+
+    @property
+    def kernel(self) -> str | None:
+        """
+        The closed form every engine evaluates for the hand, or None if the hand has none.
+
+        UNIQUE_CARDS_KERNEL applies when every card affected by the requirements must be selected (e.g. a straight
+        flush or four of a kind), so the probability is C(N - k, n - k) / C(N, n) for k such cards, in O(1).
+        SINGLE_REQUIREMENT_KERNEL applies to a single requirement (e.g. a pair or a flush), whose probability is
+        the hypergeometric survival function, summed in O(out_of) over the fewer of the counts below
+        and above at_least; LOG_ENGINE always sums the counts from at_least up, because subtracting
+        floating-point logarithms would cancel.
+
+        The kernels are used by single evaluations, by curve() and sweep() of the exact engines, whose steps then
+        update the O(1) or O(out_of) kernel terms, and by the NumPy arrays indexed from the curve.
+        """
+        return self._kernel
+
+    def _closed_form_kernel(self) -> str | None:
+        requirements = self.signature.requirements
+        if all(at_least == out_of for at_least, out_of in requirements):
+            return ProbabilityFunction.UNIQUE_CARDS_KERNEL
+        if len(requirements) == 1:
+            return ProbabilityFunction.SINGLE_REQUIREMENT_KERNEL
+        return None
+
+    @property
+    def _deck_size(self) -> int:
+        return self.signature.deck_size
+
+    @property
+    def _total_cards_checked(self) -> int:
+        return sum(out_of for _, out_of in self.signature.requirements)
+
+    def __call__(self, selected_cards_count: int) -> float:
+        """
+        Returns the probability of having the hand when the specified number of cards is selected from the deck.
+
+        A NumPy integer array of selected cards counts is also accepted, in which case the whole curve is computed
+        once in a batch and a float64 array indexed from it is returned.
+        """
+        if np is not None and isinstance(selected_cards_count, np.ndarray):
+            return self._array_probabilities(selected_cards_count)
+        if selected_cards_count not in self._values:
+            self._values[selected_cards_count] = self._evaluate(selected_cards_count)
+        return self._values[selected_cards_count]
+
+    def curve(self) -> list[float]:
+        """
+        Returns the probabilities of having the hand for every number of selected cards from 0 to the deck size,
+        computed from a single enumeration.
+        """
+        if self._curve is None:
+            object.__setattr__(self, "_curve", tuple(self._evaluate_curve()))
+            self._values.update(enumerate(self._curve))
+        return list(self._curve)
+
+    def sweep(self):
+        """
+        Yields (selected_cards_count, probability) pairs for every number of selected cards from 0 to the deck size.
+
+        Instead of computing every binomial coefficient C(rest, n - t) of the sum anew, the coefficients of all terms
+        and the denominator C(deck_size, n) are carried over from the previous number of selected cards with
+        the recurrence C(r, k + 1) = C(r, k) * (r - k) / (k + 1), so every step costs O(terms). The exact engines
+        update integers and yield the same probabilities as curve(); LOG_ENGINE adds the logarithms of the ratios.
+        """
+        if self.engine == ProbabilityFunction.LOG_ENGINE:
+            return self._log_sweep()
+        if self._kernel is not None:
+            return self._exact_sweep(self._kernel_terms())
+        if self.engine == ProbabilityFunction.PRODUCT_ENGINE:
+            return self._exact_sweep(self._tables)
+        rest_size = self._deck_size - self._total_cards_checked
+        return self._exact_sweep([(ways, total_count, rest_size)
+                                  for total_count, ways in enumerate(self._tables) if ways])
+
+    def explain(self) -> EvaluationPlan:
+        """
+        Returns the formulation PRODUCT_ENGINE uses for the hand and the number of terms every formulation sums.
+
+        DIRECT_FORMULATION sums over the counts of cards that satisfy every requirement. COMPLEMENT_FORMULATION
+        subtracts the selections that fail some requirement from all selections, which is cheaper when
+        the requirements allow few failing counts, e.g. 1 - P(no card of the rank) for a high card.
+        INCLUSION_EXCLUSION_FORMULATION alternately adds and subtracts the selections in which a subset
+        of the requirements fails, e.g. 2^5 subsets of missing ranks of a straight, grouped by symmetry
+        into 6 terms. Ties are resolved in the order of FORMULATIONS.
+        """
+        direct = complement = inclusion_exclusion = 1
+        complement_failing = 0
+        groups = [(requirement.at_least, requirement.out_of, group_size)
+                  for requirement, group_size in self._requirement_groups()]
+        # the count vectors failing some requirement, split by the first group that fails
+        for i, (at_least, out_of, group_size) in enumerate(groups):
+            failing = comb(out_of + group_size, group_size) - comb(out_of - at_least + group_size, group_size)
+            complement_failing += direct * failing * prod(
+                comb(later_out_of + later_size, later_size) for _, later_out_of, later_size in groups[i + 1:]
+            )
+            direct *= comb(out_of - at_least + group_size, group_size)
+            inclusion_exclusion *= comb(at_least + group_size, group_size)
+        complement += complement_failing
+
+        costs = {
+            ProbabilityFunction.DIRECT_FORMULATION: direct,
+            ProbabilityFunction.COMPLEMENT_FORMULATION: complement,
+            ProbabilityFunction.INCLUSION_EXCLUSION_FORMULATION: inclusion_exclusion,
+        }
+        return EvaluationPlan(min(ProbabilityFunction.FORMULATIONS, key=costs.__getitem__), costs)
+
+    def min_cards_for(self, probability: float) -> int | None:
+        """
+        Returns the smallest number of selected cards for which the probability of the hand is at least
+        the specified one, or None if it is never reached.
+
+        Selecting more cards never decreases the probability of at-least requirements, so the number is found
+        by a binary search over O(log deck_size) evaluations, or by bisecting the curve once it has been computed.
+        """
+        if self._curve is not None:
+            selected_cards_count = bisect_left(self._curve, probability)
+            return selected_cards_count if selected_cards_count < len(self._curve) else None
+        low, high = 0, self._deck_size + 1
+        while low < high:
+            middle = (low + high) // 2
+            if self(middle) >= probability:
+                high = middle
+            else:
+                low = middle + 1
+        return low if low <= self._deck_size else None
+
+    def numerator(self, selected_cards_count: int) -> int:
+        """
+        Returns the exact number of selections of the specified number of cards that contain the hand.
+        Divided by HandProbability.denominator() it gives the probability of the hand.
+        """
+        if self._count_polynomial is None:
+            object.__setattr__(self, "_count_polynomial", self._exact_count_polynomial())
+        return self._numerator_from_count_polynomial(self._count_polynomial, selected_cards_count)
+
+    def numerators(self) -> list[int]:
+        """
+        Returns the exact numerators of the probabilities for every number of selected cards from 0 to the deck size.
+        """
+        return [self.numerator(selected_cards_count) for selected_cards_count in range(self._deck_size + 1)]
+
+    def _array_probabilities(self, selected_cards_counts: "np.ndarray") -> "np.ndarray":
+        if not np.issubdtype(selected_cards_counts.dtype, np.integer):
+            raise TypeError("Selected cards counts must be an array of integers")
+        if selected_cards_counts.size:
+            check_selected_cards_count(int(selected_cards_counts.min()), self._deck_size)
+            check_selected_cards_count(int(selected_cards_counts.max()), self._deck_size)
+        if self._curve_array is None:
+            object.__setattr__(self, "_curve_array", np.array(self.curve(), dtype=np.float64))
+        return self._curve_array[selected_cards_counts]
+
+    def _round(self, probability: float) -> float:
+        return probability if self.digits_of_precision is None else round(probability, self.digits_of_precision)
+
+    def _evaluate(self, selected_cards_count: int) -> float:
+        if self._kernel is not None:
+            if self.engine == ProbabilityFunction.LOG_ENGINE:
+                return self._round(min(exp(self._log_closed_form_probability(selected_cards_count)), 1.0))
+            return self._round(self._closed_form_numerator(selected_cards_count)
+                               / self._binomial_table.comb(self._deck_size, selected_cards_count))
+        if self.engine == ProbabilityFunction.PRODUCT_ENGINE:
+            return self._evaluate_product(selected_cards_count)
+        if self.engine == ProbabilityFunction.CONVOLUTION_ENGINE:
+            return self._round(self._numerator_from_count_polynomial(self._tables, selected_cards_count)
+                               / self._binomial_table.comb(self._deck_size, selected_cards_count))
+        return self._evaluate_log(selected_cards_count)
+
+    def _closed_form_numerator(self, selected_cards_count: int) -> int:
+        check_selected_cards_count(selected_cards_count, self._deck_size)
+        binomial_table = self._binomial_table
+        if self._kernel == ProbabilityFunction.UNIQUE_CARDS_KERNEL:
+            unique_card_count = self._total_cards_checked
+            return binomial_table.comb(self._deck_size - unique_card_count, selected_cards_count - unique_card_count)
+
+        ((at_least, out_of),) = self.signature.requirements
+        rest_size = self._deck_size - out_of
+        if at_least <= out_of - at_least + 1:
+            return binomial_table.comb(self._deck_size, selected_cards_count) - sum(
+                binomial_table.comb(out_of, count) * binomial_table.comb(rest_size, selected_cards_count - count)
+                for count in range(at_least)
+            )
+        return sum(
+            binomial_table.comb(out_of, count) * binomial_table.comb(rest_size, selected_cards_count - count)
+            for count in range(at_least, out_of + 1)
+        )
+
+    def _kernel_terms(self) -> list[tuple[int, int, int]]:
+        """
+        Returns the closed form of the kernel as (ways, total_count, rest_size) terms of _exact_sweep().
+        """
+        if self._kernel == ProbabilityFunction.UNIQUE_CARDS_KERNEL:
+            unique_card_count = self._total_cards_checked
+            return [(1, unique_card_count, self._deck_size - unique_card_count)]
+
+        ((at_least, out_of),) = self.signature.requirements
+        rest_size = self._deck_size - out_of
+        if at_least <= out_of - at_least + 1:
+            return [(1, 0, self._deck_size)] + [
+                (-self._binomial_table.comb(out_of, count), count, rest_size) for count in range(at_least)
+            ]
+        return [(self._binomial_table.comb(out_of, count), count, rest_size)
+                for count in range(at_least, out_of + 1)]
+
+    def _log_closed_form_probability(self, selected_cards_count: int) -> float:
+        check_selected_cards_count(selected_cards_count, self._deck_size)
+        log_binomial_table = self._log_binomial_table
+        log_denominator = log_binomial_table.log_comb(self._deck_size, selected_cards_count)
+        if self._kernel == ProbabilityFunction.UNIQUE_CARDS_KERNEL:
+            unique_card_count = self._total_cards_checked
+            return log_binomial_table.log_comb(self._deck_size - unique_card_count,
+                                               selected_cards_count - unique_card_count) - log_denominator
+
+        ((at_least, out_of),) = self.signature.requirements
+        rest_size = self._deck_size - out_of
+        return _log_sum_exp([
+            log_binomial_table.log_comb(out_of, count)
+            + log_binomial_table.log_comb(rest_size, selected_cards_count - count)
+            for count in range(max(at_least, selected_cards_count - rest_size), min(out_of, selected_cards_count) + 1)
+        ]) - log_denominator
+
+    def _evaluate_curve(self) -> list[float]:
+        if self.engine == ProbabilityFunction.LOG_ENGINE:
+            return [self._evaluate(selected_cards_count) for selected_cards_count in range(self._deck_size + 1)]
+        return [probability for _, probability in self.sweep()]
+
+    def _exact_sweep(self, terms: list[tuple[int, int, int]]):
+        deck_size = self._deck_size
+        # rest_ways[i] is C(rest_size, n - total_count) of term i, the ways to select the remaining cards
+        rest_ways = [0] * len(terms)
+        denominator = 1
+        for selected_cards_count in range(deck_size + 1):
+            if selected_cards_count:
+                denominator = denominator * (deck_size - selected_cards_count + 1) // selected_cards_count
+            numerator = 0
+            for i, (ways, total_count, rest_size) in enumerate(terms):
+                rest_count = selected_cards_count - total_count
+                if rest_count == 0:
+                    rest_ways[i] = 1
+                elif rest_count > 0 and rest_ways[i]:
+                    rest_ways[i] = rest_ways[i] * (rest_size - rest_count + 1) // rest_count
+                numerator += ways * rest_ways[i]
+            yield selected_cards_count, self._round(numerator / denominator)
+
+    def _log_sweep(self):
+        deck_size = self._deck_size
+        rest_size = deck_size - self._total_cards_checked
+        log_rest_ways = []
+        log_denominator = 0.0
+        for selected_cards_count in range(deck_size + 1):
+            if selected_cards_count:
+                log_denominator += log((deck_size - selected_cards_count + 1) / selected_cards_count)
+                for total_count in range(max(selected_cards_count - 1 - rest_size, 0), len(log_rest_ways)):
+                    rest_count = selected_cards_count - 1 - total_count
+                    log_rest_ways[total_count] = (log((rest_size - rest_count) / (rest_count + 1))
+                                                  if rest_count < rest_size else -inf) + log_rest_ways[total_count]
+            if selected_cards_count < len(self._tables):
+                log_rest_ways.append(0.0)
+            log_probability = _log_sum_exp([
+                self._tables[total_count] + log_rest_ways[total_count]
+                for total_count in range(max(selected_cards_count - rest_size, 0), len(log_rest_ways))
+            ]) - log_denominator
+            yield selected_cards_count, self._round(min(exp(log_probability), 1.0))
+
+    def _requirement_groups(self) -> list[tuple[CardRequirement, int]]:
+        """
+        Returns every distinct requirement together with the number of its occurrences among the requirements.
+        """
+        occurrences = Counter(self.signature.requirements)
+        return [(CardRequirement(at_least, out_of), count) for (at_least, out_of), count in occurrences.items()]
+
+    def _exact_count_polynomial(self) -> list[int]:
+        """
+        Returns the coefficients of the product of the per-requirement count polynomials.
+
+        The coefficient at index t is the number of ways to select exactly t cards from the cards affected
+        by the requirements so that every requirement is satisfied. The polynomial of a group of identical
+        requirements is raised to the group size by repeated squaring.
+        """
+        polynomial = [1]
+        for requirement, group_size in self._requirement_groups():
+            factor = [0] * requirement.at_least + [
+                self._binomial_table.comb(requirement.out_of, count)
+                for count in range(requirement.at_least, requirement.out_of + 1)
+            ]
+            while group_size:
+                if group_size & 1:
+                    polynomial = multiply_polynomials(polynomial, factor)
+                group_size >>= 1
+                if group_size:
+                    factor = multiply_polynomials(factor, factor)
+        return polynomial
+
+    def _numerator_from_count_polynomial(self, count_polynomial: list[int], selected_cards_count: int) -> int:
+        check_selected_cards_count(selected_cards_count, self._deck_size)
+        rest_size = self._deck_size - self._total_cards_checked
+
+        return sum(
+            ways * self._binomial_table.comb(rest_size, selected_cards_count - total_count)
+            for total_count, ways in enumerate(count_polynomial[:selected_cards_count + 1])
+        )
+
+    def _multiset_terms(self, out_of: int, group_size: int, counts: range) -> list[tuple[tuple[int, ...], int]]:
+        """
+        Returns the sorted multisets of card counts of a group of identical requirements together with the number
+        of ways to select them, weighted by their multinomial multiplicity. A group of k requirements
+        with r possible counts yields C(r + k - 1, k) multisets instead of r^k count vectors.
+        """
+        terms = []
+        for card_counts in combinations_with_replacement(counts, group_size):
+            multiplicity = factorial(group_size) // prod(
+                factorial(repetitions) for repetitions in Counter(card_counts).values()
+            )
+            terms.append((card_counts, multiplicity * prod(self._binomial_table.comb(out_of, count)
+                                                           for count in card_counts)))
+        return terms
+
+    def _planned_terms(self, formulation: str) -> list[tuple[int, int, int]]:
+        """
+        Returns the (ways, total_count, rest_size) terms of the formulation, such that the numerator
+        of the probability is the sum of ways * C(rest_size, selected_cards_count - total_count).
+
+        Every group of identical requirements contributes (total_count, ways, constrained_cards) triples;
+        the rest of a term consists of the cards not constrained by any of its group triples.
+        """
+        direct = formulation == ProbabilityFunction.DIRECT_FORMULATION
+        complement = formulation == ProbabilityFunction.COMPLEMENT_FORMULATION
+        satisfied, failing, unconstrained, inclusion_exclusion = [], [], [], []
+        for requirement, group_size in self._requirement_groups():
+            at_least, out_of = requirement.at_least, requirement.out_of
+            if direct or complement:
+                satisfied.append([
+                    (sum(card_counts), ways, group_size * out_of)
+                    for card_counts, ways in self._multiset_terms(out_of, group_size, range(at_least, out_of + 1))
+                ])
+            if complement:
+                unconstrained.append([
+                    (sum(card_counts), ways, group_size * out_of)
+                    for card_counts, ways in self._multiset_terms(out_of, group_size, range(out_of + 1))
+                ])
+                # card_counts are sorted, so the group fails when its smallest count does
+                failing.append([
+                    (sum(card_counts), ways, group_size * out_of)
+                    for card_counts, ways in self._multiset_terms(out_of, group_size, range(out_of + 1))
+                    if card_counts[0] < at_least
+                ])
+            if not direct and not complement:
+                # j failing requirements of the group chosen in C(k, j) ways, the others left unconstrained
+                inclusion_exclusion.append([
+                    (sum(card_counts), (-1) ** failing_count * comb(group_size, failing_count) * ways,
+                     failing_count * out_of)
+                    for failing_count in range(group_size + 1)
+                    for card_counts, ways in self._multiset_terms(out_of, failing_count, range(at_least))
+                ])
+
+        if direct:
+            combinations = [(1, product(*satisfied))]
+        elif complement:
+            # all selections minus the ones failing some requirement, split by the first group that fails
+            combinations = [(1, [()])] + [
+                (-1, product(*satisfied[:i], failing[i], *unconstrained[i + 1:])) for i in range(len(failing))
+            ]
+        else:
+            combinations = [(1, product(*inclusion_exclusion))]
+
+        merged = {}
+        for sign, terms_combinations in combinations:
+            for terms in terms_combinations:
+                key = (sum(total_count for total_count, _, _ in terms),
+                       self._deck_size - sum(constrained_cards for _, _, constrained_cards in terms))
+                merged[key] = merged.get(key, 0) + sign * prod(ways for _, ways, _ in terms)
+        return [(ways, total_count, rest_size) for (total_count, rest_size), ways in sorted(merged.items()) if ways]
+
+    def _evaluate_product(self, selected_cards_count: int) -> float:
+        check_selected_cards_count(selected_cards_count, self._deck_size)
+
+        probability = sum(
+            ways * self._binomial_table.comb(rest_size, selected_cards_count - total_count)
+            for ways, total_count, rest_size in self._tables
+        ) / self._binomial_table.comb(self._deck_size, selected_cards_count)
+
+        return self._round(probability)
+
+    @staticmethod
+    def _log_multiply_polynomials(a: list[float], b: list[float]) -> list[float]:
+        terms = [[] for _ in range(len(a) + len(b) - 1)]
+        for i, a_coefficient in enumerate(a):
+            if a_coefficient != -inf:
+                for j, b_coefficient in enumerate(b):
+                    if b_coefficient != -inf:
+                        terms[i + j].append(a_coefficient + b_coefficient)
+        return [_log_sum_exp(coefficient_terms) for coefficient_terms in terms]
+
+    def _log_count_polynomial(self) -> list[float]:
+        """
+        Returns the natural logarithms of the coefficients returned by _exact_count_polynomial().
+        """
+        polynomial = [0.0]
+        for requirement, group_size in self._requirement_groups():
+            factor = [-inf] * requirement.at_least + [
+                self._log_binomial_table.log_comb(requirement.out_of, count)
+                for count in range(requirement.at_least, requirement.out_of + 1)
+            ]
+            while group_size:
+                if group_size & 1:
+                    polynomial = ProbabilityFunction._log_multiply_polynomials(polynomial, factor)
+                group_size >>= 1
+                if group_size:
+                    factor = ProbabilityFunction._log_multiply_polynomials(factor, factor)
+        return polynomial
+
+    def _evaluate_log(self, selected_cards_count: int) -> float:
+        check_selected_cards_count(selected_cards_count, self._deck_size)
+        rest_size = self._deck_size - self._total_cards_checked
+
+        log_probability = _log_sum_exp([
+            log_ways + self._log_binomial_table.log_comb(rest_size, selected_cards_count - total_count)
+            for total_count, log_ways in enumerate(self._tables[:selected_cards_count + 1])
+        ]) - self._log_binomial_table.log_comb(self._deck_size, selected_cards_count)
+
+        return self._round(min(exp(log_probability), 1.0))
+
+
+class JointCountDistribution:
+    """
+    Joint distribution of the exact numbers of selected cards of several disjoint classes of cards
+    (e.g. the jacks and the queens) when a fixed number of cards is selected from the deck.
+
+    The tensor of counts and its multidimensional suffix and prefix sums are computed once, so every at-least,
+    at-most or exact query is then answered in O(1).
+
+    :ivar class_sizes: The number of cards of every class in the deck.
+    :type class_sizes: tuple[int, ...]
+    :ivar selected_cards_count: The number of cards selected from the deck.
+    :type selected_cards_count: int
+    :ivar digits_of_precision: The number of decimal places to which probabilities are rounded.
+        If None, probabilities are not rounded.
+    :type digits_of_precision: int | None
+
+    Example:
+        The distribution for the jacks and the queens of a 24 card deck with 12 selected cards
+
+        distribution = JointCountDistribution(deck_info, (4, 4), 12)
+
+        answers a pair of jacks as distribution.at_least(2, 0), two pair as distribution.at_least(2, 2)
+        and a full house as distribution.at_least(3, 2).
+    """
+    def __init__(self, deck_info: DeckInfo, class_sizes: tuple[int, ...], selected_cards_count: int,
+                 digits_of_precision: int | None = None):
+        if any(class_size < 0 for class_size in class_sizes):
+            raise ValueError("Class sizes must be non-negative")
+        if sum(class_sizes) > deck_info.deck_size:
+            raise ValueError("Classes must not contain more cards than the deck")
+        check_selected_cards_count(selected_cards_count, deck_info.deck_size)
+        self.class_sizes = tuple(class_sizes)
+        self.selected_cards_count = selected_cards_count
+        self.digits_of_precision = digits_of_precision
+
+        binomial_table = deck_info.binomial_table
+        rest_size = deck_info.deck_size - sum(class_sizes)
+        self._strides = []
+        stride = 1
+        for class_size in reversed(self.class_sizes):
+            self._strides.append(stride)
+            stride *= class_size + 1
+        self._strides.reverse()
+        self._total = binomial_table.comb(deck_info.deck_size, selected_cards_count)
+
+        self._exact = [
+            prod((binomial_table.comb(class_size, count) for class_size, count in zip(self.class_sizes, counts)),
+                 start=binomial_table.comb(rest_size, selected_cards_count - sum(counts)))
+            for counts in product(*(range(class_size + 1) for class_size in self.class_sizes))
+        ]
+        self._at_least = self._cumulative_sums(reverse=True)
+        self._at_most = self._cumulative_sums(reverse=False)
+
+    def _cumulative_sums(self, reverse: bool) -> list[int]:
+        """
+        Returns the multidimensional suffix sums (if reverse) or prefix sums of the exact counts,
+        accumulating along one axis at a time.
+        """
+        sums = list(self._exact)
+        for class_size, stride in zip(self.class_sizes, self._strides):
+            if reverse:
+                for index in range(len(sums) - 1, -1, -1):
+                    if (index // stride) % (class_size + 1) < class_size:
+                        sums[index] += sums[index + stride]
+            else:
+                for index in range(len(sums)):
+                    if (index // stride) % (class_size + 1) > 0:
+                        sums[index] += sums[index - stride]
+        return sums
+
+    def _check_arity(self, counts: tuple[int, ...]) -> None:
+        if len(counts) != len(self.class_sizes):
+            raise ValueError("A count must be specified for every class")
+
+    def _index(self, counts: tuple[int, ...]) -> int:
+        return sum(count * stride for count, stride in zip(counts, self._strides))
+
+    def _probability(self, ways: int) -> float:
+        probability = ways / self._total
+        return probability if self.digits_of_precision is None else round(probability, self.digits_of_precision)
+
+    def exact(self, *counts: int) -> float:
+        """
+        Returns the probability of selecting exactly the specified number of cards of every class.
+        """
+        self._check_arity(counts)
+        if any(count < 0 or count > class_size for count, class_size in zip(counts, self.class_sizes)):
+            return self._probability(0)
+        return self._probability(self._exact[self._index(counts)])
+
+    def at_least(self, *counts: int) -> float:
+        """
+        Returns the probability of selecting at least the specified number of cards of every class.
+        """
+        self._check_arity(counts)
+        if any(count > class_size for count, class_size in zip(counts, self.class_sizes)):
+            return self._probability(0)
+        return self._probability(self._at_least[self._index(tuple(max(count, 0) for count in counts))])
+
+    def at_most(self, *counts: int) -> float:
+        """
+        Returns the probability of selecting at most the specified number of cards of every class.
+        """
+        self._check_arity(counts)
+        if any(count < 0 for count in counts):
+            return self._probability(0)
+        return self._probability(self._at_most[self._index(
+            tuple(min(count, class_size) for count, class_size in zip(counts, self.class_sizes))
+        )])
+
 
 class HandProbability:
     """
@@ -56,26 +953,68 @@ class HandProbability:
     :ivar digits_of_precision: The number of decimal places to which probabilities are rounded.
         If None, probabilities are not rounded.
     :type digits_of_precision: int | None
+    :ivar engine: The algorithm used by the created probability functions, one of ENGINES.
+        See ProbabilityFunction for the description of the engines.
+    :type engine: str
+    :ivar cache_size: The maximum number of compiled probability functions kept in the cache.
+        If 0, functions are not cached.
+    :type cache_size: int
+    :ivar known_cards_count: The number of known cards removed from the deck by given(), 0 for a full deck.
+    :type known_cards_count: int
+    :ivar known_of_ranks: The numbers of known cards of the ranks the wrapper functions refer to, in order.
+    :type known_of_ranks: tuple[int, ...]
+    :ivar known_of_suits: The numbers of known cards of the suits the wrapper functions refer to, in order.
+    :type known_of_suits: tuple[int, ...]
     """
-    def __init__(self, deck_info: DeckInfo, digits_of_precision: int | None = None):
+    PRODUCT_ENGINE = ProbabilityFunction.PRODUCT_ENGINE
+    CONVOLUTION_ENGINE = ProbabilityFunction.CONVOLUTION_ENGINE
+    LOG_ENGINE = ProbabilityFunction.LOG_ENGINE
+    ENGINES = ProbabilityFunction.ENGINES
+    LOG_ENGINE_RELATIVE_ERROR = ProbabilityFunction.LOG_ENGINE_RELATIVE_ERROR
+
+    def __init__(self, deck_info: DeckInfo, digits_of_precision: int | None = None, engine: str = PRODUCT_ENGINE,
+                 cache_size: int = 128):
+        if engine not in HandProbability.ENGINES:
+            raise ValueError(f"engine must be one of {HandProbability.ENGINES}")
+        if cache_size < 0:
+            raise ValueError("cache_size must be non-negative")
         self.deck_info = deck_info
         self.digits_of_precision = digits_of_precision
+        self.engine = engine
+        self.cache_size = cache_size
+        self.known_cards_count = 0
+        self.known_of_ranks: tuple[int, ...] = ()
+        self.known_of_suits: tuple[int, ...] = ()
+        self._compiled_functions: OrderedDict[tuple[HandSignature, str, int | None], ProbabilityFunction] = \
+            OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._joint_distributions: dict[tuple[tuple[int, ...], int], JointCountDistribution] = {}
+        self._conditional_decks: dict[int, DeckInfo] = {}
+        self._conditional: dict[tuple[int, tuple[int, ...], tuple[int, ...]], HandProbability] = {}
 
-    @staticmethod
-    def _k_from_n_combinations(n: int, k: int) -> int:
-        if k < 0 or k > n:
-            return 0
-        return comb(n, k)
+    def _k_from_n_combinations(self, n: int, k: int) -> int:
+        return self.deck_info.binomial_table.comb(n, k)
 
-    def create_probability_func(self, *card_requirements: CardRequirement) -> Callable[[int], float]:
+    def create_probability_func(self, *card_requirements: CardRequirement) -> ProbabilityFunction:
         """
         Returns a function that calculates the probability of a hand described by the specified requirements.
-        Cards affected by individual requirements must not overlap.
+        Cards affected by individual requirements must not overlap; use card_set_probability.CardSetProbability
+        for requirements that do.
+
+        Compiled functions are kept in a least recently used cache keyed by the hand signature, the engine
+        and the precision, so the same hand requested again, with requirements in any order, returns the same
+        function together with the probabilities it has already computed.
 
         :param card_requirements: Requirements for the hand. Each requirement specifies the minimum number
             of cards needed.
         :return: A function that calculates the probability of having the hand based on the number
-            of selected cards.
+            of selected cards. Its curve() method returns the probabilities for every number of selected cards
+            from 0 to the deck size, computed from a single enumeration. The function also accepts a NumPy integer
+            array of selected cards counts, for which it computes the curve once and returns a float64 array
+            indexed from it.
+            Its numerator() and numerators() methods return the exact number of selections containing the hand,
+            to be compared directly or divided by denominator().
 
         Example:
             To calculate the probability of having 3 out of 4 jacks and 2 out of 3 available queens call this function
@@ -84,40 +1023,208 @@ class HandProbability:
             func = HandProbability(deck_info).create_probability_func(CardRequirement(3, 4), CardRequirement(2, 3))
 
             func(12) returns the probability of the hand when 12 random cards are selected from the deck
+
+            func.curve()[12] returns the same probability
         """
 
-        total_cards_checked = 0
-        ranges = []
-        for card_requirement in card_requirements:
-            total_cards_checked += card_requirement.out_of
-            ranges.append(range(card_requirement.at_least, card_requirement.out_of + 1))
+        # engine and digits_of_precision may be changed between calls, so they are part of the key
+        key = (self.hand_signature(*card_requirements), self.engine, self.digits_of_precision)
+        probability_func = self._compiled_functions.get(key)
+        if probability_func is not None:
+            self._cache_hits += 1
+            self._compiled_functions.move_to_end(key)
+            return probability_func
 
-        def probability_func(selected_cards_count: int) -> float:
-            if selected_cards_count < 0:
-                raise ValueError("Selected cards count must be non-negative")
-            if selected_cards_count > self.deck_info.deck_size:
-                raise ValueError("Selected cards count must be less than or equal to deck size")
+        self._cache_misses += 1
+        probability_func = ProbabilityFunction(self.deck_info, card_requirements, self.engine, self.digits_of_precision)
+        if self.cache_size > 0:
+            self._compiled_functions[key] = probability_func
+            if len(self._compiled_functions) > self.cache_size:
+                self._compiled_functions.popitem(last=False)
+        return probability_func
 
-            probability = sum(
-                prod(
-                    (HandProbability._k_from_n_combinations(requirement.out_of, count)
-                     for requirement, count in zip(card_requirements, card_counts)),
-                    start=HandProbability._k_from_n_combinations(self.deck_info.deck_size - total_cards_checked,
-                                                                 selected_cards_count - sum(card_counts))
-                ) for card_counts in product(*ranges)
-            ) / HandProbability._k_from_n_combinations(self.deck_info.deck_size, selected_cards_count)
+    def given(self, known_cards_count: int, known_of_ranks: tuple[int, ...] = (),
+              known_of_suits: tuple[int, ...] = ()) -> "HandProbability":
+        """
+        Returns the HandProbability for the cards that remain unknown when the specified number of cards
+        of the deck is known (e.g. on your own hand), whether or not they match the hand.
 
-            return probability if self.digits_of_precision is None else round(probability, self.digits_of_precision)
+        The derived deck has deck_size reduced by the known cards. The numbers of known cards of the ranks
+        and suits of interest reduce the class sizes used by the wrapper functions: requirement i
+        of at_least_of_ranks_probability_function() refers to the rank with known_of_ranks[i] known cards
+        (0 beyond the tuple) and is reduced with CardRequirement.matched(), and likewise for suits.
+        Requirements passed to create_probability_func() of the returned object describe the unknown cards only,
+        so reduce them by the known matching cards with CardRequirement.matched(). The cards of
+        unique_cards_probability_function() are assumed not to be known.
 
-        return probability_func
+        The derived deck_info keeps the class sizes of the full deck, so it describes the classes without
+        known cards only; HandCategoryProbability, which requires classes of equal size, does not accept it.
+
+        The derived decks with their binomial tables are cached per number of known cards, and the derived objects
+        with their compiled functions per known cards of the ranks and suits, so repeated queries during a game
+        are answered from the cache.
+
+        :param known_cards_count: The number of known cards.
+        :param known_of_ranks: The numbers of known cards of the ranks the wrapper functions refer to.
+        :param known_of_suits: The numbers of known cards of the suits the wrapper functions refer to.
+        :return: The HandProbability of the derived deck.
+
+        Example:
+            Holding 5 cards including one jack, the probability that the other 12 cards on the table complete
+            a pair of jacks is
+
+            hand_probability.given(5, known_of_ranks=(1,)).at_least_of_ranks_probability_function(2)(12)
+        """
+        if self.known_cards_count:
+            raise ValueError("given() must be called on the HandProbability of the full deck")
+        if not 0 <= known_cards_count <= self.deck_info.deck_size:
+            raise ValueError("known_cards_count must be between 0 and deck size")
+        known_of_ranks, known_of_suits = tuple(known_of_ranks), tuple(known_of_suits)
+        for known_of_classes, class_size, class_count in (
+                (known_of_ranks, self.deck_info.cards_of_rank_count, self.deck_info.rank_count),
+                (known_of_suits, self.deck_info.cards_of_suit_count, self.deck_info.suit_count)):
+            if len(known_of_classes) > class_count:
+                raise ValueError("More classes of known cards than the deck contains")
+            if any(not 0 <= known <= class_size for known in known_of_classes):
+                raise ValueError("Known cards of a class must be between 0 and the number of its cards")
+            if sum(known_of_classes) > known_cards_count:
+                raise ValueError("Known cards of the classes must not exceed known_cards_count")
+        if known_cards_count == 0:
+            return self
+
+        key = (known_cards_count, known_of_ranks, known_of_suits)
+        conditional = self._conditional.get(key)
+        if conditional is None:
+            deck_info = self._conditional_decks.get(known_cards_count)
+            if deck_info is None:
+                deck_info = DeckInfo(self.deck_info.deck_size - known_cards_count, self.deck_info.cards_of_rank_count,
+                                     self.deck_info.cards_of_suit_count)
+                self._conditional_decks[known_cards_count] = deck_info
+            conditional = HandProbability(deck_info, self.digits_of_precision, self.engine, self.cache_size)
+            conditional.known_cards_count = known_cards_count
+            conditional.known_of_ranks = known_of_ranks
+            conditional.known_of_suits = known_of_suits
+            self._conditional[key] = conditional
+        return conditional
+
+    @staticmethod
+    def _class_requirements(at_least_of_classes: tuple[int, ...], class_size: int,
+                            known_of_classes: tuple[int, ...]) -> list[CardRequirement]:
+        return [
+            CardRequirement(at_least, class_size).matched(known_of_classes[i] if i < len(known_of_classes) else 0)
+            for i, at_least in enumerate(at_least_of_classes)
+        ]
+
+    def hand_signature(self, *card_requirements: CardRequirement) -> HandSignature:
+        """
+        Returns the canonical signature of a hand described by the specified requirements.
+
+        Hands that differ only in the order of their requirements have equal signatures.
+
+        :param card_requirements: Requirements for the hand.
+        :return: A hashable signature of the hand and the deck.
+        """
+        return HandSignature.of(self.deck_info, card_requirements)
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns the statistics of the cache of compiled probability functions.
+        """
+        return CacheInfo(self._cache_hits, self._cache_misses, self.cache_size, len(self._compiled_functions))
+
+    def cache_clear(self) -> None:
+        """
+        Removes all compiled probability functions from the cache and resets its statistics.
+        """
+        self._compiled_functions.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def joint_count_distribution(self, class_sizes: tuple[int, ...], selected_cards_count: int) \
+            -> JointCountDistribution:
+        """
+        Returns the joint distribution of the numbers of selected cards of the specified disjoint classes.
+        The distribution is computed once per class sizes and number of selected cards and then reused.
+
+        :param class_sizes: The number of cards of every class in the deck.
+        :param selected_cards_count: The number of cards selected from the deck.
+        :return: The distribution answering at-least, at-most and exact queries in O(1).
+        """
+        key = (tuple(class_sizes), selected_cards_count)
+        if key not in self._joint_distributions:
+            self._joint_distributions[key] = JointCountDistribution(
+                self.deck_info, key[0], selected_cards_count, self.digits_of_precision
+            )
+        return self._joint_distributions[key]
+
+    def denominator(self, selected_cards_count: int) -> int:
+        """
+        Returns the number of ways to select the specified number of cards from the deck, which is the shared
+        denominator of the exact probabilities of all hands for that number of selected cards.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        return self._k_from_n_combinations(self.deck_info.deck_size, selected_cards_count)
+
+    @staticmethod
+    def numerator_table(*probability_funcs: ProbabilityFunction) -> list[list[int]]:
+        """
+        Returns the exact numerators of the probabilities of the specified hands for every number of selected cards.
+
+        :param probability_funcs: Functions returned by create_probability_func() for the same deck.
+        :return: A list indexed by the number of selected cards, from 0 to the deck size, of lists holding
+            the numerator of every hand in the order of the arguments.
+        """
+        return [list(numerators) for numerators in zip(*(func.numerators() for func in probability_funcs))]
+
+    def min_cards_for(self, probability: float, *card_requirements: CardRequirement) -> int | None:
+        """
+        Returns the smallest number of selected cards for which the probability of the hand described
+        by the requirements is at least the specified one, or None if it is never reached.
+
+        Example:
+            hand_probability.min_cards_for(0.5, CardRequirement(3, 4), CardRequirement(2, 4))
+
+            returns the number of cards that must be on the table before a full house is more likely than not
+        """
+        return self.create_probability_func(*card_requirements).min_cards_for(probability)
+
+    @staticmethod
+    def min_cards_table(probabilities: list[float],
+                        *probability_funcs: ProbabilityFunction) -> list[list[int | None]]:
+        """
+        Returns the smallest numbers of selected cards for which the specified hands reach every
+        specified probability.
+
+        :param probabilities: The probability thresholds.
+        :param probability_funcs: Functions returned by create_probability_func().
+        :return: A list holding, for every hand in the order of the arguments, the smallest number of selected
+            cards for every threshold in the order of probabilities, or None for thresholds never reached.
+        """
+        return [[func.min_cards_for(probability) for probability in probabilities] for func in probability_funcs]
+
+    @staticmethod
+    def rank_by_probability(selected_cards_count: int, *probability_funcs: ProbabilityFunction) -> list[int]:
+        """
+        Returns the indices of the specified hands ordered from the most to the least probable one
+        for the specified number of selected cards.
+
+        The hands are compared by their exact numerators, so probabilities that are equal after conversion
+        to float are still ordered correctly. Hands with equal probabilities keep the order of the arguments.
+
+        :param selected_cards_count: The number of cards selected from the deck.
+        :param probability_funcs: Functions returned by create_probability_func() for the same deck.
+        :return: Indices of probability_funcs sorted by decreasing probability.
+        """
+        numerators = [func.numerator(selected_cards_count) for func in probability_funcs]
+        return sorted(range(len(numerators)), key=lambda i: -numerators[i])
 
-    def at_least_of_ranks_probability_function(self, *at_least_of_ranks: int) -> Callable[[int], float]:
+    def at_least_of_ranks_probability_function(self, *at_least_of_ranks: int) -> ProbabilityFunction:
         """
         Returns a function that calculates the probability of selecting at least the specified number of cards of
         the specified ranks from the deck.
 
         Wrapper function for create_probability_func() that uses DeckInfo.cards_of_rank_count as the total number
-        of cards for every requirement.
+        of cards for every requirement, reduced by the known cards of the ranks of an object returned by given().
 
         :param at_least_of_ranks: The number of cards of each rank to be selected.
         :return: A function that calculates the probability of having the hand based on the number
@@ -132,16 +1239,17 @@ class HandProbability:
             func(12) returns the probability of the hand when 12 random cards are selected from the deck
         """
         return self.create_probability_func(
-            *(CardRequirement(k, self.deck_info.cards_of_rank_count) for k in at_least_of_ranks)
+            *HandProbability._class_requirements(at_least_of_ranks, self.deck_info.cards_of_rank_count,
+                                                 self.known_of_ranks)
         )
 
-    def at_least_of_suits_probability_function(self, *at_least_of_suits: int) -> Callable[[int], float]:
+    def at_least_of_suits_probability_function(self, *at_least_of_suits: int) -> ProbabilityFunction:
         """
         Returns a function that calculates the probability of selecting at least the specified number
         of cards of the specified suits from the deck.
 
         Wrapper function for create_probability_func() that uses DeckInfo.cards_of_suit_count as the total number
-        of cards for every requirement.
+        of cards for every requirement, reduced by the known cards of the suits of an object returned by given().
 
         :param at_least_of_suits: The number of cards of each suit to be selected.
         :return: A function that calculates the probability of having the hand based on the number
@@ -156,10 +1264,11 @@ class HandProbability:
             func(12) returns the probability of the hand when 12 random cards are selected from the deck
         """
         return self.create_probability_func(
-            *(CardRequirement(k, self.deck_info.cards_of_suit_count) for k in at_least_of_suits)
+            *HandProbability._class_requirements(at_least_of_suits, self.deck_info.cards_of_suit_count,
+                                                 self.known_of_suits)
         )
 
-    def unique_cards_probability_function(self, unique_card_count: int) -> Callable[[int], float]:
+    def unique_cards_probability_function(self, unique_card_count: int) -> ProbabilityFunction:
         """
         Returns a function that calculates the probability of selecting the specified number
         of defined unique cards from the deck.
@@ -0,0 +1,70 @@
+# Script measuring the throughput and latency of probability_service.py on localhost by sending the queries
+# of probability_data_generator.py from many concurrent clients.
+
+from hand_probability import DeckInfo
+from probability_data_generator import hand_requirements, flatten
+from probability_service import ProbabilityService, ProbabilityClient
+from time import perf_counter
+import argparse
+import asyncio
+import random
+
+
+async def _run_client(host: str, port: int, queries: list, requests: int, seed: int) -> None:
+    rng = random.Random(seed)
+    async with await ProbabilityClient.connect(host, port) as client:
+        await asyncio.gather(*(
+            client.probability(*rng.choice(queries)) for _ in range(requests)
+        ))
+
+
+async def _load_test(args) -> None:
+    service = None
+    if args.port is None:
+        service = ProbabilityService(DeckInfo(24, 4, 6), jobs=args.jobs)
+        server = await service.serve(args.host, 0)
+        port = server.sockets[0].getsockname()[1]
+    else:
+        port = args.port
+
+    queries = [
+        ([list(requirement) for requirement in requirements], selected_cards_count)
+        for requirements in flatten(list(hand_requirements().values()))
+        for selected_cards_count in range(1, 24)
+    ]
+    start = perf_counter()
+    await asyncio.gather(*(
+        _run_client(args.host, port, queries, args.requests, seed) for seed in range(args.clients)
+    ))
+    seconds = perf_counter() - start
+
+    async with await ProbabilityClient.connect(args.host, port) as client:
+        stats = await client.stats()
+    total = args.clients * args.requests
+    print(f"{total} requests from {args.clients} clients in {seconds:.3f} s ({total / seconds:,.0f} requests/s)")
+    print(f"evaluations: {stats['evaluations']}, cache hits: {stats['cacheHits']}, coalesced: {stats['coalesced']}")
+    latency = stats["latency"]
+    print(f"latency p50 <= {latency['p50Seconds'] * 1000:.3f} ms, p99 <= {latency['p99Seconds'] * 1000:.3f} ms")
+    for upper_bound, count in latency["bucketsMicroseconds"].items():
+        print(f"  <= {int(upper_bound):>9} us: {count}")
+
+    if service is not None:
+        server.close()
+        await server.wait_closed()
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None,
+                        help="port of a running service (default: start a service in this process)")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="requests sent by every client")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes of the started service")
+    args = parser.parse_args()
+    asyncio.run(_load_test(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+# Vectorized Monte Carlo simulator dealing random subsets of the deck, used to validate the exact formulas
+# of the hand_probability module and to estimate hands that have no exact implementation.
+
+from card_set_probability import CardSetRequirement, consecutive_card_sets
+from concurrent.futures import ProcessPoolExecutor
+from hand_probability import DeckInfo, HandProbability, CardRequirement, check_selected_cards_count
+from statistics import NormalDist
+from typing import NamedTuple
+import argparse
+import numpy as np
+
+
+class Estimate(NamedTuple):
+    """
+    Estimated probability with its confidence interval.
+
+    :ivar probability: The fraction of simulated deals containing the hand.
+    :ivar lower: The lower bound of the Wilson score confidence interval.
+    :ivar upper: The upper bound of the Wilson score confidence interval.
+    :ivar samples: The number of simulated deals.
+    """
+    probability: float
+    lower: float
+    upper: float
+    samples: int
+
+    def contains(self, probability: float) -> bool:
+        """
+        Checks whether the specified probability lies within the confidence interval.
+        """
+        return self.lower <= probability <= self.upper
+
+
+class DealtCardSetsPredicate:
+    """
+    Checks that every card set requirement is satisfied by the dealt cards. The sets may overlap.
+    """
+    def __init__(self, deck_info: DeckInfo, *card_set_requirements: CardSetRequirement):
+        self.masks = np.zeros((len(card_set_requirements), deck_info.deck_size), dtype=np.int32)
+        for i, requirement in enumerate(card_set_requirements):
+            self.masks[i, list(requirement.cards)] = 1
+        self.at_least = np.array([requirement.at_least for requirement in card_set_requirements], dtype=np.int32)
+
+    def __call__(self, cards: np.ndarray, rank_counts: np.ndarray, suit_counts: np.ndarray) -> np.ndarray:
+        # (batch, selected) cards -> (batch, requirements) counts of selected cards of every requirement
+        counts = self.masks[:, cards].sum(axis=2).T
+        return (counts >= self.at_least).all(axis=1)
+
+
+class AnyOfRanksPredicate:
+    """
+    Checks that distinct ranks with at least the specified numbers of cards were dealt (e.g. any full house).
+    """
+    def __init__(self, *at_least_of_ranks: int):
+        self.at_least = np.array(sorted(at_least_of_ranks, reverse=True), dtype=np.int32)
+
+    def __call__(self, cards: np.ndarray, rank_counts: np.ndarray, suit_counts: np.ndarray) -> np.ndarray:
+        return _any_of_classes(rank_counts, self.at_least)
+
+
+class AnyOfSuitsPredicate:
+    """
+    Checks that distinct suits with at least the specified numbers of cards were dealt (e.g. any flush).
+    """
+    def __init__(self, *at_least_of_suits: int):
+        self.at_least = np.array(sorted(at_least_of_suits, reverse=True), dtype=np.int32)
+
+    def __call__(self, cards: np.ndarray, rank_counts: np.ndarray, suit_counts: np.ndarray) -> np.ndarray:
+        return _any_of_classes(suit_counts, self.at_least)
+
+
+def _any_of_classes(class_counts: np.ndarray, at_least: np.ndarray) -> np.ndarray:
+    if len(at_least) > class_counts.shape[1]:
+        return np.zeros(class_counts.shape[0], dtype=bool)
+    largest = -np.sort(-class_counts, axis=1)[:, :len(at_least)]
+    return (largest >= at_least).all(axis=1)
+
+
+class MonteCarloSimulator:
+    """
+    Estimates hand probabilities by dealing many random subsets of the deck at once.
+
+    Every batch is a matrix of random keys whose row-wise argpartition selects a uniformly random subset of cards
+    per row. Counts of cards by rank and by suit are computed with a single bincount per batch. Cards are numbered
+    as described by DeckInfo.
+
+    :ivar deck_info: The information related to the deck being utilized.
+    :type deck_info: DeckInfo
+    :ivar batch_size: The number of deals simulated at once.
+    :type batch_size: int
+    """
+    def __init__(self, deck_info: DeckInfo, batch_size: int = 100_000):
+        deck_info.check_classes()
+        self.deck_info = deck_info
+        self.batch_size = batch_size
+        self._rank_count = deck_info.rank_count
+        self._suit_count = deck_info.suit_count
+        cards = np.arange(deck_info.deck_size)
+        self._rank_of_card = deck_info.rank_of(cards)
+        self._suit_of_card = deck_info.suit_of(cards)
+
+    def deal(self, rng: np.random.Generator, selected_cards_count: int, deals: int) -> np.ndarray:
+        """
+        Returns a (deals, selected_cards_count) matrix of indices of randomly selected cards.
+        """
+        if selected_cards_count == 0:
+            return np.empty((deals, 0), dtype=np.intp)
+        keys = rng.random((deals, self.deck_info.deck_size))
+        return np.argpartition(keys, selected_cards_count - 1, axis=1)[:, :selected_cards_count]
+
+    def _class_counts(self, class_of_cards: np.ndarray, class_count: int) -> np.ndarray:
+        deals = class_of_cards.shape[0]
+        offsets = np.arange(deals)[:, np.newaxis] * class_count
+        return np.bincount((class_of_cards + offsets).ravel(), minlength=deals * class_count).reshape(
+            deals, class_count
+        )
+
+    def count_hits(self, predicate, selected_cards_count: int, samples: int, seed) -> int:
+        """
+        Returns the number of simulated deals for which the predicate holds.
+
+        :param predicate: Callable taking the (deals, selected) card matrix and the (deals, ranks) and
+            (deals, suits) count matrices and returning a boolean array of deals containing the hand.
+        :param selected_cards_count: The number of cards selected from the deck.
+        :param samples: The number of deals to simulate.
+        :param seed: Seed of the random generator, e.g. a numpy.random.SeedSequence.
+        """
+        rng = np.random.default_rng(seed)
+        hits = 0
+        for start in range(0, samples, self.batch_size):
+            cards = self.deal(rng, selected_cards_count, min(self.batch_size, samples - start))
+            rank_counts = self._class_counts(self._rank_of_card[cards], self._rank_count)
+            suit_counts = self._class_counts(self._suit_of_card[cards], self._suit_count)
+            hits += int(np.count_nonzero(predicate(cards, rank_counts, suit_counts)))
+        return hits
+
+    def estimate(self, predicate, selected_cards_count: int, samples: int = 1_000_000, confidence: float = 0.99,
+                 jobs: int = 1, seed: int | None = None) -> Estimate:
+        """
+        Estimates the probability that the predicate holds for randomly selected cards.
+
+        :param predicate: See count_hits(). It must be picklable when jobs is greater than 1.
+        :param selected_cards_count: The number of cards selected from the deck.
+        :param samples: The number of deals to simulate.
+        :param confidence: The confidence level of the returned interval.
+        :param jobs: The number of worker processes the samples are sharded across.
+        :param seed: Seed making the estimate reproducible.
+        :return: The estimated probability with its Wilson score confidence interval.
+        """
+        check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        shards = [samples // jobs + (1 if i < samples % jobs else 0) for i in range(jobs)]
+        seeds = np.random.SeedSequence(seed).spawn(jobs)
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                hits = sum(executor.map(self.count_hits, [predicate] * jobs, [selected_cards_count] * jobs,
+                                        shards, seeds))
+        else:
+            hits = self.count_hits(predicate, selected_cards_count, samples, seeds[0])
+        return _wilson_interval(hits, samples, confidence)
+
+    def estimate_card_requirements(self, *card_requirements: CardRequirement, selected_cards_count: int,
+                                   **kwargs) -> Estimate:
+        """
+        Estimates the probability of a hand described by disjoint CardRequirement objects laid out on the cards
+        by card_set_probability.consecutive_card_sets().
+        """
+        predicate = DealtCardSetsPredicate(self.deck_info, *consecutive_card_sets(self.deck_info, *card_requirements))
+        return self.estimate(predicate, selected_cards_count, **kwargs)
+
+    def compare(self, hand_probability: HandProbability, *card_requirements: CardRequirement,
+                selected_cards_counts: range | None = None, **kwargs) -> list[tuple[int, float, Estimate]]:
+        """
+        Compares the exact probabilities of create_probability_func() with simulated estimates.
+
+        :return: (selected cards count, exact probability, estimate) triples.
+        """
+        if selected_cards_counts is None:
+            selected_cards_counts = range(self.deck_info.deck_size + 1)
+        func = hand_probability.create_probability_func(*card_requirements)
+        return [
+            (selected_cards_count, func(selected_cards_count),
+             self.estimate_card_requirements(*card_requirements, selected_cards_count=selected_cards_count, **kwargs))
+            for selected_cards_count in selected_cards_counts
+        ]
+
+
+def _wilson_interval(hits: int, samples: int, confidence: float) -> Estimate:
+    if samples == 0:
+        return Estimate(float("nan"), 0.0, 1.0, 0)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    probability = hits / samples
+    denominator = 1 + z * z / samples
+    center = (probability + z * z / (2 * samples)) / denominator
+    margin = z * (probability * (1 - probability) / samples + z * z / (4 * samples * samples)) ** 0.5 / denominator
+    return Estimate(probability, max(center - margin, 0.0), min(center + margin, 1.0), samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=1_000_000, help="deals simulated per table size")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random generator")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    deck_info = DeckInfo(deck_size=24, cards_of_rank_count=4, cards_of_suit_count=6)
+    hand_probability = HandProbability(deck_info)
+    simulator = MonteCarloSimulator(deck_info)
+
+    hands = {
+        "pair": (CardRequirement(2, 4),),
+        "two pair": (CardRequirement(2, 4), CardRequirement(2, 4)),
+        "full house": (CardRequirement(3, 4), CardRequirement(2, 4)),
+        "straight": tuple(CardRequirement(1, 4) for _ in range(5)),
+        "flush": (CardRequirement(5, 6),),
+    }
+    mismatches = 0
+    for name, card_requirements in hands.items():
+        for selected_cards_count, exact, estimate in simulator.compare(
+                hand_probability, *card_requirements, selected_cards_counts=range(1, deck_info.deck_size),
+                samples=args.samples, jobs=args.jobs, seed=args.seed):
+            status = "ok" if estimate.contains(exact) else "OUTSIDE"
+            mismatches += not estimate.contains(exact)
+            print(f"{name:>10} n={selected_cards_count:>2} exact={exact:.6f} "
+                  f"estimate={estimate.probability:.6f} [{estimate.lower:.6f}, {estimate.upper:.6f}] {status}")
+    print(f"{mismatches} exact probabilities outside of the 99% confidence intervals")
+
+
+if __name__ == '__main__':
+    main()
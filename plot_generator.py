@@ -19,15 +19,15 @@ def main():
     four_of_a_kind_func = hand_probability.at_least_of_ranks_probability_function(4)
     straight_flush_func = hand_probability.unique_cards_probability_function(5)
 
-    plt.plot(selected_cards, np.vectorize(high_card_func)(selected_cards), label='High Card')
-    plt.plot(selected_cards, np.vectorize(pair_func)(selected_cards), label='Pair')
-    plt.plot(selected_cards, np.vectorize(two_pair_func)(selected_cards), label='Two Pair')
-    plt.plot(selected_cards, np.vectorize(straight_func)(selected_cards), label='Straight')
-    plt.plot(selected_cards, np.vectorize(three_of_a_kind_func)(selected_cards), label='Three of a Kind')
-    plt.plot(selected_cards, np.vectorize(full_house_func)(selected_cards), label='Full House')
-    plt.plot(selected_cards, np.vectorize(flush_func)(selected_cards), label='Flush')
-    plt.plot(selected_cards, np.vectorize(four_of_a_kind_func)(selected_cards), label='Four of a Kind')
-    plt.plot(selected_cards, np.vectorize(straight_flush_func)(selected_cards), label='Straight Flush')
+    plt.plot(selected_cards, high_card_func(selected_cards), label='High Card')
+    plt.plot(selected_cards, pair_func(selected_cards), label='Pair')
+    plt.plot(selected_cards, two_pair_func(selected_cards), label='Two Pair')
+    plt.plot(selected_cards, straight_func(selected_cards), label='Straight')
+    plt.plot(selected_cards, three_of_a_kind_func(selected_cards), label='Three of a Kind')
+    plt.plot(selected_cards, full_house_func(selected_cards), label='Full House')
+    plt.plot(selected_cards, flush_func(selected_cards), label='Flush')
+    plt.plot(selected_cards, four_of_a_kind_func(selected_cards), label='Four of a Kind')
+    plt.plot(selected_cards, straight_flush_func(selected_cards), label='Straight Flush')
 
     plt.legend()
     plt.title('Probability of a specific poker hand in liar\'s poker (e.g. "a pair of jacks")')
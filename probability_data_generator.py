@@ -1,95 +1,158 @@
 # Script generating a JSON file containing the probability of all poker hands in the liar's poker card game
 # taking into account cards on your own hand that already match a specified poker hand.
 
-from hand_probability import DeckInfo, HandProbability, CardRequirement
+from hand_probability import DeckInfo, HandProbability, CardRequirement, ProbabilityFunction
+from probability_table import write_probability_table
+from concurrent.futures import ProcessPoolExecutor
 from itertools import repeat
+import argparse
 import json
 
 OUTPUT_FILE_NAME: str = "probability_data.json"
+BINARY_OUTPUT_FILE_NAME: str = "probability_data.bin"
+BINARY_TYPECODE: str = "f"  # "f" for float32 or "d" for float64 values
+THRESHOLDS_OUTPUT_FILE_NAME: str = "probability_thresholds.json"
+PROBABILITY_THRESHOLDS: tuple[float, ...] = (0.1, 0.25, 0.5, 0.75, 0.9)
 DIGITS_OF_PRECISION: int | None = 4
 PRETTIFY: bool = False
 
+DECK_INFO: DeckInfo = DeckInfo(deck_size=24, cards_of_rank_count=4, cards_of_suit_count=6)
 
-def list_of_probabilities(func: callable):
-    return [func(i) for i in range(1, 24)]
 
+def list_of_probabilities(func: callable):
+    return func.curve()[1:24]
 
-def main():
-    deck_info = DeckInfo(deck_size=24, cards_of_rank_count=4, cards_of_suit_count=6)
-    hand_probability = HandProbability(deck_info, digits_of_precision=DIGITS_OF_PRECISION)
 
-    probability_data = {
+def hand_requirements() -> dict[str, list]:
+    """
+    Returns the requirements of every hand and matched cards combination as (at_least, out_of) pairs,
+    nested in the same layout as the generated JSON file.
+    """
+    return {
         "highCard": [
-            list_of_probabilities(
-                hand_probability.create_probability_func(CardRequirement(1, 4))
-            )
+            ((1, 4),)
         ],
         "pair": [
-            list_of_probabilities(
-                hand_probability.create_probability_func(CardRequirement(2 - matched_cards, 4 - matched_cards))
-            )
+            ((2 - matched_cards, 4 - matched_cards),)
             for matched_cards in range(2)
         ],
         "threeOfAKind": [
-            list_of_probabilities(
-                hand_probability.create_probability_func(CardRequirement(3 - matched_cards, 4 - matched_cards))
-            )
+            ((3 - matched_cards, 4 - matched_cards),)
             for matched_cards in range(3)
         ],
         "fourOfAKind": [
-            list_of_probabilities(
-                hand_probability.create_probability_func(CardRequirement(4 - matched_cards, 4 - matched_cards))
-            )
+            ((4 - matched_cards, 4 - matched_cards),)
             for matched_cards in range(4)
         ],
         "twoPair": [[
-            list_of_probabilities(
-                hand_probability.create_probability_func(
-                    CardRequirement(2 - matched_first_cards, 4 - matched_first_cards),
-                    CardRequirement(2 - matched_second_cards, 4 - matched_second_cards)
-                )
-            )
+            ((2 - matched_first_cards, 4 - matched_first_cards), (2 - matched_second_cards, 4 - matched_second_cards))
             for matched_second_cards in range(matched_first_cards + 1)
             if matched_second_cards != 2  # case 2+2 is always 100% probable
         ]
             for matched_first_cards in range(3)
         ],
         "fullHouse": [[
-            list_of_probabilities(
-                hand_probability.create_probability_func(
-                    CardRequirement(3 - matched_first_cards, 4 - matched_first_cards),
-                    CardRequirement(2 - matched_second_cards, 4 - matched_second_cards)
-                )
-            )
+            ((3 - matched_first_cards, 4 - matched_first_cards), (2 - matched_second_cards, 4 - matched_second_cards))
             for matched_second_cards in range(3)
             if not (matched_first_cards == 3 and matched_second_cards == 2)  # case 3+2 is always 100% probable
         ]
             for matched_first_cards in range(4)
         ],
         "straight": [
-            list_of_probabilities(
-                hand_probability.at_least_of_ranks_probability_function(*repeat(1, 5 - matched_cards))
-            )
+            tuple(repeat((1, DECK_INFO.cards_of_rank_count), 5 - matched_cards))
             for matched_cards in range(5)
         ],
         "flush": [
-            list_of_probabilities(
-                hand_probability.create_probability_func(CardRequirement(5 - matched_count, 6 - matched_count))
-            )
+            ((5 - matched_count, 6 - matched_count),)
             for matched_count in range(5)
         ],
         "straightFlush": [
-            list_of_probabilities(
-                hand_probability.unique_cards_probability_function(5 - matched_count),
-            )
+            tuple(repeat((1, 1), 5 - matched_count))
             for matched_count in range(5)
         ]
     }
 
+
+def flatten(layout: list) -> list[tuple[tuple[int, int], ...]]:
+    """
+    Returns the requirements nested in the layout of hand_requirements() as a flat list.
+    """
+    return [task for item in layout for task in (flatten(item) if isinstance(item, list) else [item])]
+
+
+def _fill(layout: list, results) -> list:
+    return [_fill(item, results) if isinstance(item, list) else next(results) for item in layout]
+
+
+def probabilities_of(func: ProbabilityFunction) -> list[float]:
+    """
+    Calculates the probabilities of a single hand for every number of cards on the table.
+    """
+    return list_of_probabilities(func)
+
+
+def generate_probability_data(jobs: int = 1) -> dict[str, list]:
+    """
+    Calculates the probabilities of all hands, running the independent hand and matched cards combinations
+    on the specified number of worker processes. The result does not depend on the number of processes.
+    """
+    hand_probability = HandProbability(DECK_INFO, digits_of_precision=DIGITS_OF_PRECISION)
+    layout = hand_requirements()
+    tasks = [
+        hand_probability.create_probability_func(*(CardRequirement(*requirement) for requirement in requirements))
+        for requirements in flatten(list(layout.values()))
+    ]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(probabilities_of, tasks))
+    else:
+        results = [probabilities_of(task) for task in tasks]
+
+    return dict(zip(layout.keys(), _fill(list(layout.values()), iter(results))))
+
+
+def generate_threshold_data(thresholds: tuple[float, ...] = PROBABILITY_THRESHOLDS) -> dict:
+    """
+    Returns the smallest number of cards on the table at which every hand reaches every threshold,
+    or None for thresholds not reached with at most 23 cards on the table, nested in the same layout
+    as the probability data. The numbers are found from the unrounded probabilities.
+    """
+    hand_probability = HandProbability(DECK_INFO)
+    layout = hand_requirements()
+    funcs = [
+        hand_probability.create_probability_func(*(CardRequirement(*requirement) for requirement in requirements))
+        for requirements in flatten(list(layout.values()))
+    ]
+    min_cards = [
+        [None if selected_cards_count is None or selected_cards_count > 23 else selected_cards_count
+         for selected_cards_count in hand_min_cards]
+        for hand_min_cards in HandProbability.min_cards_table(list(thresholds), *funcs)
+    ]
+
+    return {
+        "thresholds": list(thresholds),
+        "minCards": dict(zip(layout.keys(), _fill(list(layout.values()), iter(min_cards))))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    probability_data = generate_probability_data(args.jobs)
+
     indent = 4 if PRETTIFY else None
     with open(OUTPUT_FILE_NAME, "w") as f:
         json.dump(probability_data, f, indent=indent)
 
+    with open(THRESHOLDS_OUTPUT_FILE_NAME, "w") as f:
+        json.dump(generate_threshold_data(), f, indent=indent)
+
+    write_probability_table(BINARY_OUTPUT_FILE_NAME, DECK_INFO, probability_data, typecode=BINARY_TYPECODE)
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
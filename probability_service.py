@@ -0,0 +1,294 @@
+# Local asyncio service answering probability queries over newline-delimited JSON on TCP, so game server
+# processes can share a single cache of probabilities instead of recomputing the same curves.
+#
+# Every request is a JSON object on its own line:
+#   {"id": 1, "requirements": [[3, 4], [2, 4]], "selected": 12}  -> {"id": 1, "probability": 0.3035}
+#   {"id": 2, "requirements": [[5, 6]]}                          -> {"id": 2, "curve": [0.0, ...]}
+#   {"id": 3, "stats": true}                                     -> {"id": 3, "stats": {...}}
+# Failed requests are answered with {"id": ..., "error": "..."}. Responses may arrive out of order.
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from hand_probability import DeckInfo, HandProbability, CardRequirement, check_selected_cards_count
+from time import perf_counter
+import argparse
+import asyncio
+import itertools
+import json
+
+_worker_hand_probabilities: dict[tuple, HandProbability] = {}
+
+
+def _evaluate(deck_parameters: tuple[int, int, int], digits_of_precision: int | None,
+              requirements: tuple[tuple[int, int], ...], selected_cards_count: int | None) -> float | list[float]:
+    """
+    Evaluates a query in a worker process, reusing the compiled probability functions of the process.
+    """
+    key = (deck_parameters, digits_of_precision)
+    hand_probability = _worker_hand_probabilities.get(key)
+    if hand_probability is None:
+        hand_probability = HandProbability(DeckInfo(*deck_parameters), digits_of_precision=digits_of_precision)
+        _worker_hand_probabilities[key] = hand_probability
+    func = hand_probability.create_probability_func(*(CardRequirement(*requirement) for requirement in requirements))
+    return func.curve() if selected_cards_count is None else func(selected_cards_count)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with logarithmic buckets; bucket i counts latencies from 2^(i-1) to 2^i microseconds.
+    """
+    BUCKET_COUNT = 32
+
+    def __init__(self):
+        self.buckets = [0] * LatencyHistogram.BUCKET_COUNT
+        self.count = 0
+        self.total_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        microseconds = int(seconds * 1_000_000)
+        self.buckets[min(microseconds.bit_length(), LatencyHistogram.BUCKET_COUNT - 1)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returns the upper bound of the bucket containing the specified fraction of latencies, in seconds.
+        """
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= threshold:
+                return (1 << bucket) / 1_000_000
+        return 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "meanSeconds": self.total_seconds / self.count if self.count else 0.0,
+            "p50Seconds": self.percentile(0.5),
+            "p99Seconds": self.percentile(0.99),
+            "bucketsMicroseconds": {1 << bucket: count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class ProbabilityService:
+    """
+    Answers probability queries of a single deck, caching the results and coalescing identical queries
+    that arrive while the first of them is still being evaluated. Evaluations run on a pool of worker
+    processes so that long ones do not block the event loop.
+
+    Queries are keyed by the sorted requirements, so requirements listed in a different order share
+    a cache entry.
+
+    :ivar deck_info: The information related to the deck being utilized.
+    :type deck_info: DeckInfo
+    :ivar digits_of_precision: The number of decimal places to which probabilities are rounded.
+        If None, probabilities are not rounded.
+    :type digits_of_precision: int | None
+    """
+    def __init__(self, deck_info: DeckInfo, digits_of_precision: int | None = None, jobs: int = 1,
+                 cache_size: int = 1024):
+        self.deck_info = deck_info
+        self.digits_of_precision = digits_of_precision
+        self._executor = ProcessPoolExecutor(max_workers=jobs)
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple, float | list[float]] = OrderedDict()
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+        self._cache_hits = 0
+        self._coalesced = 0
+        self._evaluations = 0
+        self._latencies = LatencyHistogram()
+
+    def _key(self, requirements, selected_cards_count: int | None) -> tuple:
+        card_requirements = [CardRequirement(at_least, out_of) for at_least, out_of in requirements]
+        if sum(requirement.out_of for requirement in card_requirements) > self.deck_info.deck_size:
+            raise ValueError("Requirements affect more cards than the deck contains")
+        if selected_cards_count is not None:
+            check_selected_cards_count(selected_cards_count, self.deck_info.deck_size)
+        return tuple(sorted((requirement.at_least, requirement.out_of) for requirement in card_requirements)), \
+            selected_cards_count
+
+    async def query(self, requirements, selected_cards_count: int | None = None) -> float | list[float]:
+        """
+        Returns the probability of the hand for the number of selected cards, or its whole curve
+        if the number is None.
+
+        :param requirements: (at_least, out_of) pairs of the requirements of the hand.
+        """
+        key = self._key(requirements, selected_cards_count)
+        if key in self._cache:
+            self._cache_hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if key in self._in_flight:
+            self._coalesced += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, _evaluate,
+            (self.deck_info.deck_size, self.deck_info.cards_of_rank_count, self.deck_info.cards_of_suit_count),
+            self.digits_of_precision, *key
+        )
+        self._in_flight[key] = future
+        self._evaluations += 1
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._in_flight[key]
+        self._cache[key] = result
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters and the latency histogram of the answered requests.
+        """
+        return {
+            "cacheHits": self._cache_hits,
+            "coalesced": self._coalesced,
+            "evaluations": self._evaluations,
+            "cacheSize": len(self._cache),
+            "latency": self._latencies.snapshot(),
+        }
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        start = perf_counter()
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("stats"):
+                response = {"stats": self.stats()}
+            else:
+                result = await self.query(request["requirements"], request.get("selected"))
+                response = {"curve": result} if request.get("selected") is None else {"probability": result}
+        except Exception as error:
+            response = {"error": f"{type(error).__name__}: {error}"}
+        self._latencies.record(perf_counter() - start)
+        writer.write(json.dumps({"id": request_id, **response}).encode() + b"\n")
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except (asyncio.CancelledError, ConnectionError):
+            pass  # the service is shutting down or the client went away
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.Server:
+        """
+        Starts accepting connections. Requests of a single connection are answered concurrently.
+        """
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def close(self) -> None:
+        """
+        Shuts the worker processes down.
+        """
+        self._executor.shutdown()
+
+
+class ProbabilityClient:
+    """
+    Client of ProbabilityService. Requests sent over one connection are pipelined, so a single client
+    can have many queries in flight at once.
+
+    Example:
+        async with await ProbabilityClient.connect() as client:
+            await client.probability([(3, 4), (2, 4)], 12)
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._pending: dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765) -> "ProbabilityClient":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _receive(self) -> None:
+        while line := await self._reader.readline():
+            response = json.loads(line)
+            future = self._pending.pop(response["id"], None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            future.set_exception(ConnectionError("Connection closed by the service"))
+
+    async def _request(self, request: dict) -> dict:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps({"id": request_id, **request}).encode() + b"\n")
+        await self._writer.drain()
+        response = await future
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    async def probability(self, requirements, selected_cards_count: int) -> float:
+        """
+        Returns the probability of the hand described by (at_least, out_of) pairs for the number of selected cards.
+        """
+        return (await self._request({"requirements": requirements, "selected": selected_cards_count}))["probability"]
+
+    async def curve(self, requirements) -> list[float]:
+        """
+        Returns the probabilities of the hand for every number of selected cards from 0 to the deck size.
+        """
+        return (await self._request({"requirements": requirements}))["curve"]
+
+    async def stats(self) -> dict:
+        return (await self._request({"stats": True}))["stats"]
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._receiver
+
+
+async def _serve_forever(service: ProbabilityService, host: str, port: int) -> None:
+    server = await service.serve(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--deck", type=int, nargs=3, default=(24, 4, 6),
+                        metavar=("DECK_SIZE", "CARDS_OF_RANK", "CARDS_OF_SUIT"))
+    parser.add_argument("--digits", type=int, default=None, help="digits of precision of the probabilities")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    service = ProbabilityService(DeckInfo(*args.deck), digits_of_precision=args.digits, jobs=args.jobs)
+    try:
+        asyncio.run(_serve_forever(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import mmap
+import struct
+from hand_probability import DeckInfo
+
+_MAGIC = b"LPPT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHIIIcIII")
+_NAME_LENGTH = struct.Struct("<H")
+_PATH_LENGTH = struct.Struct("<B")
+_DATA_ALIGNMENT = 8
+TYPECODES = ("f", "d")
+
+
+def _leaves(node: list, path: tuple[int, ...] = ()):
+    if node and not isinstance(node[0], list):
+        yield path, node
+        return
+    for i, child in enumerate(node):
+        yield from _leaves(child, (*path, i))
+
+
+def write_probability_table(file_name: str, deck_info: DeckInfo, probability_data: dict[str, list],
+                            first_selected_cards_count: int = 1, typecode: str = "d") -> None:
+    """
+    Writes probabilities in the layout produced by probability_data_generator.py to a binary table file.
+
+    The file consists of a fixed header with the deck parameters, an index of (hand, matched cards) entries
+    and the probabilities of all entries stored one after another as float32 or float64 arrays, so a single
+    probability can be read without parsing the rest of the file.
+
+    :param file_name: The path of the created file.
+    :param deck_info: The deck the probabilities were calculated for.
+    :param probability_data: Lists of probabilities keyed by hand name, nested by the number of matched cards
+        of every requirement of the hand.
+    :param first_selected_cards_count: The number of selected cards of the first probability of every list.
+    :param typecode: "f" to store float32 values or "d" to store float64 values.
+    """
+    if typecode not in TYPECODES:
+        raise ValueError(f"typecode must be one of {TYPECODES}")
+
+    entries = [(hand, path, probabilities)
+               for hand, node in probability_data.items()
+               for path, probabilities in _leaves(node)]
+    selected_cards_counts = {len(probabilities) for _, _, probabilities in entries}
+    if len(selected_cards_counts) > 1:
+        raise ValueError("All hands must have probabilities for the same numbers of selected cards")
+    values_per_entry = selected_cards_counts.pop() if selected_cards_counts else 0
+
+    index = bytearray()
+    for hand, path, _ in entries:
+        name = hand.encode()
+        index += _NAME_LENGTH.pack(len(name)) + name
+        index += _PATH_LENGTH.pack(len(path)) + bytes(path)
+    padding = -(_HEADER.size + len(index)) % _DATA_ALIGNMENT
+
+    with open(file_name, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, deck_info.deck_size, deck_info.cards_of_rank_count,
+                             deck_info.cards_of_suit_count, typecode.encode(), first_selected_cards_count,
+                             values_per_entry, len(entries)))
+        f.write(index)
+        f.write(bytes(padding))
+        for _, _, probabilities in entries:
+            f.write(struct.pack(f"<{values_per_entry}{typecode}", *probabilities))
+
+
+class ProbabilityTable:
+    """
+    Reader of binary probability tables written by write_probability_table().
+
+    The file is memory-mapped, so processes reading the same file share one page-cached copy of it.
+    Only the header and the index are parsed when the table is opened; every probability is then read
+    directly from the mapped file in O(1).
+
+    :ivar deck_info: The deck the probabilities were calculated for.
+    :type deck_info: DeckInfo
+    :ivar first_selected_cards_count: The smallest number of selected cards stored in the table.
+    :type first_selected_cards_count: int
+    :ivar last_selected_cards_count: The largest number of selected cards stored in the table.
+    :type last_selected_cards_count: int
+
+    Example:
+        with ProbabilityTable("probability_data.bin") as table:
+            table.probability("fullHouse", (1, 0), 12)
+
+        returns the probability of a full house when one card of the three is on your hand and 12 cards
+        are on the table
+    """
+    def __init__(self, file_name: str):
+        with open(file_name, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, deck_size, cards_of_rank_count, cards_of_suit_count, typecode, first_selected_cards_count,
+         values_per_entry, entry_count) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f"{file_name} is not a probability table of version {_VERSION}")
+
+        self.deck_info = DeckInfo(deck_size, cards_of_rank_count, cards_of_suit_count)
+        self.first_selected_cards_count = first_selected_cards_count
+        self.last_selected_cards_count = first_selected_cards_count + values_per_entry - 1
+        self._value = struct.Struct(f"<{typecode.decode()}")
+        self._values_per_entry = values_per_entry
+
+        self._entries: dict[tuple[str, tuple[int, ...]], int] = {}
+        offset = _HEADER.size
+        for entry in range(entry_count):
+            (name_length,) = _NAME_LENGTH.unpack_from(self._mmap, offset)
+            offset += _NAME_LENGTH.size
+            hand = self._mmap[offset:offset + name_length].decode()
+            offset += name_length
+            (path_length,) = _PATH_LENGTH.unpack_from(self._mmap, offset)
+            offset += _PATH_LENGTH.size
+            path = tuple(self._mmap[offset:offset + path_length])
+            offset += path_length
+            self._entries[(hand, path)] = entry
+        self._data_offset = offset + -offset % _DATA_ALIGNMENT
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmaps the table file.
+        """
+        self._mmap.close()
+
+    def keys(self) -> list[tuple[str, tuple[int, ...]]]:
+        """
+        Returns the (hand, matched cards) pairs stored in the table in the order of the file.
+        """
+        return list(self._entries)
+
+    def probability(self, hand: str, matched_cards: int | tuple[int, ...], selected_cards_count: int) -> float:
+        """
+        Returns the stored probability of the hand.
+
+        :param hand: The name of the hand, e.g. "pair".
+        :param matched_cards: The number of matched cards for every requirement of the hand; a single int
+            for hands with a single level of matched cards.
+        :param selected_cards_count: The number of cards on the table.
+        :return: The probability of the hand.
+        """
+        path = (matched_cards,) if isinstance(matched_cards, int) else tuple(matched_cards)
+        entry = self._entries.get((hand, path))
+        if entry is None:
+            raise KeyError((hand, path))
+        if not self.first_selected_cards_count <= selected_cards_count <= self.last_selected_cards_count:
+            raise ValueError("Selected cards count is not stored in the table")
+
+        value_index = entry * self._values_per_entry + selected_cards_count - self.first_selected_cards_count
+        return self._value.unpack_from(self._mmap, self._data_offset + value_index * self._value.size)[0]